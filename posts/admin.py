@@ -1,6 +1,14 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.urls import path
+from django.utils import timezone
 
+from .export import FORMATS, export_rows, iter_export
 from .models import Post, Group
+from .search import filter_matching, fts_enabled
+
+CONTENT_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,6 +17,38 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        # На SQLite ищем по индексу FTS5 вместо LIKE '%...%' по всей таблице.
+        if search_term.strip() and fts_enabled(queryset.db):
+            return filter_matching(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def get_urls(self):
+        return [
+            path("export/", self.admin_site.admin_view(self.export_view),
+                 name="posts_post_export"),
+        ] + super().get_urls()
+
+    def export_view(self, request):
+        """Выгрузка постов; параметры GET как у команды export_posts."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        fmt = request.GET.get("format", "jsonl")
+        if fmt not in FORMATS:
+            return HttpResponseBadRequest(f"Формат: {', '.join(FORMATS)}")
+        try:
+            rows = export_rows(**{
+                name: request.GET.get(name)
+                for name in ("group", "author", "since", "until")
+            })
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        response = StreamingHttpResponse(
+            iter_export(fmt, rows), content_type=CONTENT_TYPES[fmt])
+        filename = f"posts-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ("pk", "title", "description", "slug")
@@ -0,0 +1,202 @@
+"""JSON API лент: главная, сообщество, автор и отдельный пост.
+
+Страница выбирается по индексам TimelineEntry, как в HTML-лентах, а
+посты читаются values_list только с колонками из `?fields=`: без
+экземпляров моделей и без JOIN, если поля автора и сообщества не нужны.
+Листание вперед по курсору `?after=` из поля next ответа.
+
+POST api/posts/batch/ создает пачку постов вошедшего пользователя,
+см. posts/batch.py.
+"""
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from yatube.routers import replica_reads
+
+from . import batch
+from . import counters
+from . import timeline
+from .cache import cache_anonymous_feed, conditional_feed
+from .forms import PostForm
+from .models import Group, Post, PostCount, User
+from .paginator import decode_cursor, encode_cursor
+from .views import author_scopes, group_scopes, index_scopes
+
+# Поле ответа и колонка values_list для него.
+FIELDS = {
+    "id": "pk",
+    "text": "text",
+    "text_html": "text_html",
+    "pub_date": "pub_date",
+    "updated_at": "updated_at",
+    "version": "version",
+    "author": "author__username",
+    "author_first_name": "author__first_name",
+    "author_last_name": "author__last_name",
+    "group": "group__slug",
+    "group_title": "group__title",
+}
+DEFAULT_FIELDS = ("id", "text", "pub_date", "author", "group")
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status,
+                        json_dumps_params={"ensure_ascii": False})
+
+
+def _error(message, status):
+    return _json({"error": message}, status)
+
+
+def parse_fields(value):
+    """Поля из `?fields=a,b` в порядке запроса; BadRequest для неизвестных."""
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(
+        name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        raise BadRequest("Неизвестные поля: " + ", ".join(unknown))
+    return fields or DEFAULT_FIELDS
+
+
+def parse_limit(value):
+    if not value:
+        return PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise BadRequest("limit: ожидается целое число")
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def parse_batch(body):
+    """Посты из тела {"posts": [{"text": ..., "group": id}, ...]}."""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise BadRequest("Тело запроса должно быть JSON")
+    posts = data.get("posts") if isinstance(data, dict) else None
+    if not isinstance(posts, list) or not posts:
+        raise BadRequest("posts: ожидается непустой список")
+    if len(posts) > settings.POST_BATCH_LIMIT:
+        raise BadRequest(
+            f"posts: не больше {settings.POST_BATCH_LIMIT} за запрос")
+    if not all(isinstance(post, dict) for post in posts):
+        raise BadRequest("posts: каждый пост — объект")
+    return posts
+
+
+def post_rows(posts, fields):
+    """Словари постов с полями fields; pk первой колонкой для порядка."""
+    rows = posts.order_by().values_list(
+        "pk", *(FIELDS[name] for name in fields))
+    return {row[0]: dict(zip(fields, row[1:])) for row in rows}
+
+
+def feed_page(request, **filters):
+    """Страница ленты {"results", "next"} по курсору `?after=`."""
+    fields = parse_fields(request.GET.get("fields"))
+    limit = parse_limit(request.GET.get("limit"))
+    entries = timeline.entries(**filters).order_by(*timeline.ORDERING)
+    after = request.GET.get("after")
+    if after:
+        cursor = decode_cursor(after)
+        if cursor is None:
+            raise BadRequest("after: неверный курсор")
+        pub_date, pk, _ = cursor
+        entries = entries.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, post_id__lt=pk))
+    keys = list(entries.values_list("post_id", "pub_date")[:limit + 1])
+    page = keys[:limit]
+    rows = post_rows(Post.objects.filter(pk__in=[pk for pk, _ in page]),
+                     fields)
+    next_cursor = None
+    if len(keys) > limit:
+        pk, pub_date = page[-1]
+        next_cursor = encode_cursor(Post(pk=pk, pub_date=pub_date), 1)
+    return {"results": [rows[pk] for pk, _ in page if pk in rows],
+            "next": next_cursor}
+
+
+def api_view(view):
+    """Переводит BadRequest в ответ 400 с описанием ошибки."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as exc:
+            return _error(str(exc), 400)
+    return wrapper
+
+
+@replica_reads
+@conditional_feed(index_scopes)
+@cache_anonymous_feed(index_scopes)
+@api_view
+def index(request):
+    return _json(feed_page(request))
+
+
+@replica_reads
+@conditional_feed(group_scopes)
+@cache_anonymous_feed(group_scopes)
+@api_view
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        "pk", flat=True).first()
+    if group_id is None:
+        return _error("Сообщество не найдено", 404)
+    return _json({"count": counters.get_count(PostCount.GROUP, group_id),
+                  **feed_page(request, group_id=group_id)})
+
+
+@replica_reads
+@conditional_feed(author_scopes)
+@api_view
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        "pk", flat=True).first()
+    if author_id is None:
+        return _error("Автор не найден", 404)
+    return _json({"count": counters.get_count(PostCount.AUTHOR, author_id),
+                  **feed_page(request, author_id=author_id)})
+
+
+@replica_reads
+@conditional_feed(author_scopes)
+@api_view
+def post_view(request, username, post_id):
+    fields = parse_fields(request.GET.get("fields"))
+    rows = post_rows(Post.objects.filter(
+        pk=post_id, author__username=username), fields)
+    if post_id not in rows:
+        return _error("Пост не найден", 404)
+    return _json(rows[post_id])
+
+
+@require_POST
+@api_view
+def create_posts(request):
+    """Пачка постов: все проходят PostForm, иначе не создается ни один."""
+    if not request.user.is_authenticated:
+        return _error("Требуется вход на сайт", 401)
+    forms = [PostForm(post) for post in parse_batch(request.body)]
+    errors = [{"index": index, "errors": form.errors.get_json_data()}
+              for index, form in enumerate(forms) if not form.is_valid()]
+    if errors:
+        return _json({"errors": errors}, 400)
+    ids = batch.create_posts(
+        request.user, [form.save(commit=False) for form in forms])
+    return _json({"ids": ids}, 201)
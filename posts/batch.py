@@ -0,0 +1,69 @@
+"""Создание пачки постов одной транзакцией.
+
+Посты и их записи ленты пишутся bulk_create, а счетчики и версии кэша
+лент сдвигаются один раз на пачку, а не на каждый пост, как в сигналах.
+insert_posts используется и загрузкой import_posts.
+"""
+from collections import Counter
+
+from django.db import NotSupportedError, connection, transaction
+
+from . import cache as feed_cache
+from . import counters
+from .models import Post, PostCount, TimelineEntry, render_text
+
+
+def _inserted_ids(posts):
+    if connection.features.can_return_ids_from_bulk_insert:
+        return [post.pk for post in posts]
+    if connection.vendor != "sqlite":
+        # На MySQL и подобных параллельные вставки перемешивают id.
+        raise NotSupportedError(
+            "Пакетная вставка постов требует СУБД, которая возвращает id "
+            "из bulk_create, или SQLite")
+    # SQLite не возвращает id из bulk_create. До конца транзакции никто
+    # другой не пишет, а id с AUTOINCREMENT только растут, поэтому
+    # последние len(posts) id — наши, в порядке вставки.
+    ids = sorted(Post.objects.order_by("-pk").values_list(
+        "pk", flat=True)[:len(posts)])
+    for post, pk in zip(posts, ids):
+        post.pk = pk
+    return ids
+
+
+def insert_posts(posts):
+    """Пишет посты, их записи ленты и счетчики; вызывать в транзакции.
+
+    Вернет id в порядке posts. Кэш лент не трогает: его сбрасывает
+    вызывающий код один раз на всю загрузку.
+    """
+    Post.objects.bulk_create(posts)
+    ids = _inserted_ids(posts)
+    TimelineEntry.objects.bulk_create(
+        TimelineEntry(post_id=post.pk, pub_date=post.pub_date,
+                      author_id=post.author_id, group_id=post.group_id)
+        for post in posts)
+    counters.bump(PostCount.TOTAL, 0, len(posts))
+    for scope, owners in ((PostCount.AUTHOR, _owners(posts, "author_id")),
+                          (PostCount.GROUP, _owners(posts, "group_id"))):
+        for object_id, added in owners.items():
+            counters.bump(scope, object_id, added)
+    return ids
+
+
+def _owners(posts, field):
+    return Counter(getattr(post, field) for post in posts
+                   if getattr(post, field))
+
+
+def create_posts(author, posts):
+    """Сохраняет несохраненные посты автора; вернет их id по порядку."""
+    if not posts:
+        return []
+    for post in posts:
+        post.author = author
+        post.text_html = render_text(post.text)
+    with transaction.atomic():
+        ids = insert_posts(posts)
+    feed_cache.invalidate_feeds(_owners(posts, "group_id"), (author.pk,))
+    return ids
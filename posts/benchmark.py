@@ -0,0 +1,86 @@
+import math
+import threading
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(values, fraction):
+    """Перцентиль методом ближайшего ранга; для пустого списка None."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _measure(call, samples):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        try:
+            ok = call()
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+    samples.append((elapsed, len(queries), ok))
+
+
+def run_concurrent(make_call, requests, concurrency):
+    """Выполняет requests вызовов в concurrency потоках.
+
+    make_call() вызывается один раз в каждом потоке и возвращает функцию
+    одного запроса, которая отдает True при успешном ответе.
+    Возвращает (samples, wall): замеры (время, запросы к БД, успех)
+    и общее время прогона.
+    """
+    samples = []
+    lock = threading.Lock()
+    share, extra = divmod(requests, concurrency)
+
+    def worker(count):
+        call = make_call()
+        local = []
+        try:
+            for _ in range(count):
+                _measure(call, local)
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        worker(requests)
+    else:
+        threads = [
+            threading.Thread(target=worker, args=(share + (i < extra),))
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, wall):
+    """Сводка прогона: перцентили задержки в мс, RPS и запросы к БД."""
+    latencies = [elapsed * 1000 for elapsed, _, _ in samples]
+    count = len(samples)
+    return {
+        "requests": count,
+        "errors": sum(1 for _, _, ok in samples if not ok),
+        "requests_per_second": round(count / wall, 2) if wall else None,
+        "latency_ms": {
+            name: round(percentile(latencies, fraction), 3)
+            if latencies else None
+            for name, fraction in (("p50", 0.5), ("p95", 0.95),
+                                   ("p99", 0.99))
+        },
+        "queries_per_request": (
+            round(sum(queries for _, queries, _ in samples) / count, 2)
+            if count else None
+        ),
+    }
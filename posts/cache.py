@@ -0,0 +1,167 @@
+"""Версии лент для кэша страниц и условных GET по ETag.
+
+Версии хранятся в кэше default, поэтому он должен быть общим для всех
+процессов: кэш в памяти процесса не увидит сдвиг версии, сделанный
+другим воркером, и тот будет отдавать 304 и старые страницы.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import condition
+
+from .models import Group, User
+
+# SITE входит в версию каждой страницы: его сдвигают изменения, которые
+# видны везде (переименование сообщества, массовая загрузка постов).
+SITE = "site"
+INDEX = "index"
+# Каталог сообществ: число постов и дата последнего в каждом.
+GROUPS = "groups"
+VERSION_KEY = "feed-version:{}"
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """manage.py check --deploy: версиям лент нужен общий для процессов кэш."""
+    if settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [checks.Warning(
+        "Версии лент хранятся в кэше процесса: воркеры не увидят чужих "
+        "правок и будут отдавать 304 и старые страницы.",
+        hint="Задайте общий кэш, например YATUBE_CACHE_DIR для файлового.",
+        id="posts.W001",
+    )]
+
+
+def group_scope(slug):
+    return f"group:{slug}"
+
+
+def author_scope(username):
+    """Профиль автора и страницы его постов."""
+    return f"author:{username}"
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def get_versions(scopes):
+    """Версии содержимого лент: время последнего изменения в мс."""
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    stored = cache.get_many(keys)
+    missing = {key: _now_ms() for key in keys if key not in stored}
+    if missing:
+        # Версия, потерянная кэшем, начинается заново с текущего времени.
+        cache.set_many(missing, timeout=None)
+        stored.update(missing)
+    return [stored[key] for key in keys]
+
+
+def bump(*scopes):
+    """Делает устаревшими все закэшированные страницы этих лент.
+
+    Внутри транзакции версии сдвигаются после коммита: иначе запрос,
+    пришедший до коммита, сохранит старую страницу под новой версией.
+    """
+    keys = [VERSION_KEY.format(scope) for scope in set(scopes)]
+    transaction.on_commit(lambda: _bump_keys(keys))
+
+
+def _bump_keys(keys):
+    stored = cache.get_many(keys)
+    now = _now_ms()
+    cache.set_many(
+        {key: max(now, stored.get(key, 0) + 1) for key in keys},
+        timeout=None,
+    )
+
+
+def invalidate_feeds(group_ids=(), author_ids=()):
+    """Сбрасывает главную ленту, ленты сообществ и страницы авторов.
+
+    Пост в сообществе меняет и каталог сообществ.
+    """
+    group_ids = {group_id for group_id in group_ids if group_id}
+    author_ids = {author_id for author_id in author_ids if author_id}
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        "slug", flat=True) if group_ids else ()
+    usernames = User.objects.filter(pk__in=author_ids).values_list(
+        "username", flat=True) if author_ids else ()
+    bump(INDEX, *(group_scope(slug) for slug in slugs),
+         *(author_scope(username) for username in usernames),
+         *((GROUPS,) if group_ids else ()))
+
+
+def _request_versions(request, scopes, kwargs):
+    # Версии нужны и ETag, и кэшу страницы.
+    if not hasattr(request, "_feed_versions"):
+        request._feed_versions = get_versions(scopes(**kwargs))
+    return request._feed_versions
+
+
+def conditional_feed(scopes):
+    """ETag по версиям лент; 304 без запросов к базе.
+
+    Страница зависит от посетителя, поэтому в ETag входит хеш cookie
+    сессии (а не пользователь: его пришлось бы читать из базы).
+    Last-Modified не отдается: он не зависит от сессии и точен только
+    до секунды, так что If-Modified-Since дал бы 304 на старую страницу.
+    """
+    def etag(request, *args, **kwargs):
+        versions = _request_versions(request, scopes, kwargs)
+        session = request.COOKIES.get(settings.SESSION_COOKIE_NAME, "")
+        viewer = hashlib.md5(session.encode()).hexdigest()[:12]
+        return "{}-{}".format(viewer, ".".join(map(str, versions)))
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_vary_headers(response, ("Cookie",))
+            return response
+        return wrapper
+    return decorator
+
+
+def cache_anonymous_feed(scopes):
+    """Кэширует страницу ленты для анонимных посетителей.
+
+    `scopes(**kwargs)` возвращает ленты, из которых собрана страница;
+    ключ включает их версии, поэтому правка поста сразу меняет ключ.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.FEED_CACHE_TIMEOUT
+            if (not timeout or request.method != "GET"
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            versions = _request_versions(request, scopes, kwargs)
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = "feed-page:{}:{}".format(
+                path, ".".join(map(str, versions)))
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, (response.content, response["Content-Type"]),
+                          timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Post, PostCount
+
+
+def _posts(scope, object_id):
+    if scope == PostCount.GROUP:
+        return Post.objects.filter(group_id=object_id)
+    if scope == PostCount.AUTHOR:
+        return Post.objects.filter(author_id=object_id)
+    return Post.objects.all()
+
+
+def recount(scope, object_id=0):
+    """Пересчитывает один счетчик по таблице постов."""
+    value = _posts(scope, object_id).count()
+    PostCount.objects.update_or_create(
+        scope=scope, object_id=object_id, defaults={"value": value})
+    return value
+
+
+def get_count(scope, object_id=0):
+    """Число постов из счетчика; отсутствующий счетчик создается один раз."""
+    value = (PostCount.objects.filter(scope=scope, object_id=object_id)
+             .values_list("value", flat=True).first())
+    if value is None:
+        value = recount(scope, object_id)
+    return value
+
+
+def bump(scope, object_id, delta):
+    """Сдвигает счетчик на delta одним UPDATE без чтения строки."""
+    updated = PostCount.objects.filter(
+        scope=scope, object_id=object_id
+    ).update(value=F("value") + delta)
+    if not updated:
+        recount(scope, object_id)
+
+
+def total_count():
+    return get_count(PostCount.TOTAL)
+
+
+def group_count(group):
+    return get_count(PostCount.GROUP, group.pk)
+
+
+def author_count(author):
+    return get_count(PostCount.AUTHOR, author.pk)
+
+
+@transaction.atomic
+def recount_all():
+    """Строит все счетчики заново; возвращает число записанных счетчиков."""
+    counters = [PostCount(scope=PostCount.TOTAL, value=Post.objects.count())]
+    for scope in (PostCount.GROUP, PostCount.AUTHOR):
+        rows = (Post.objects.exclude(**{f"{scope}__isnull": True})
+                .values(scope).annotate(value=Count("pk")).order_by())
+        counters.extend(
+            PostCount(scope=scope, object_id=row[scope], value=row["value"])
+            for row in rows
+        )
+    PostCount.objects.all().delete()
+    PostCount.objects.bulk_create(counters)
+    return len(counters)
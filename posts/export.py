@@ -0,0 +1,79 @@
+"""Потоковая выгрузка постов в JSON Lines и CSV.
+
+Строки читаются iterator(chunk_size=...) без кэша QuerySet, а выводятся
+генератором по одной, поэтому память не зависит от размера таблицы.
+Используется командой export_posts и выгрузкой в админке.
+"""
+import csv
+import json
+
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from .models import Post
+
+FORMATS = ("jsonl", "csv")
+COLUMNS = ("id", "pub_date", "updated_at", "author", "group", "text")
+CHUNK_SIZE = 2000
+
+
+def _moment(value, name):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"{name}: ожидается дата или дата и время")
+        moment = parse_datetime(f"{day.isoformat()}T00:00:00")
+    return make_aware(moment) if is_naive(moment) else moment
+
+
+def export_rows(group=None, author=None, since=None, until=None,
+                chunk_size=CHUNK_SIZE):
+    """Кортежи COLUMNS по возрастанию id.
+
+    group — slug сообщества, author — username, since/until — строки
+    ISO-даты; since включительно, until — нет. ValueError для неверных дат.
+    """
+    posts = Post.objects.order_by("pk")
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    if since:
+        posts = posts.filter(pub_date__gte=_moment(since, "since"))
+    if until:
+        posts = posts.filter(pub_date__lt=_moment(until, "until"))
+    return posts.values_list(
+        "pk", "pub_date", "updated_at", "author__username", "group__slug",
+        "text",
+    ).iterator(chunk_size=chunk_size)
+
+
+def _dates(row):
+    return [value.isoformat() if hasattr(value, "isoformat") else value
+            for value in row]
+
+
+def iter_jsonl(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(COLUMNS, _dates(row))),
+                         ensure_ascii=False) + "\n"
+
+
+class _Line:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(_dates(row))
+
+
+def iter_export(fmt, rows):
+    """Строки выгрузки в формате fmt из FORMATS."""
+    return iter_csv(rows) if fmt == "csv" else iter_jsonl(rows)
@@ -0,0 +1,138 @@
+"""Массовая загрузка постов из JSON Lines.
+
+Строка: {"author": username, "group": slug или null, "text": ...,
+"pub_date": ISO-дата, необязательно}; остальные ключи (например, id из
+export_posts) игнорируются. Авторы и сообщества ищутся одним запросом
+на пачку и запоминаются вместе с промахами; текст и сообщество
+проверяются полями PostForm. Каждая пачка пишется в своей транзакции
+вместе с записями ленты и счетчиками (batch.insert_posts), поэтому уже
+загруженные посты сразу видны в лентах, а остальная таблица не
+перестраивается.
+"""
+import itertools
+import json
+import time
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache as feed_cache
+from .batch import insert_posts
+from .forms import PostForm
+from .models import Group, Post, User, render_text
+from .seeding import explicit_pub_date
+
+
+class Lookup:
+    """Кэш name -> id; отсутствующие имена тоже запоминаются (None)."""
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def load(self, names):
+        missing = {name for name in names if name not in self.ids}
+        if not missing:
+            return
+        found = dict(self.queryset.filter(
+            **{f"{self.field}__in": missing}).values_list(self.field, "pk"))
+        for name in missing:
+            self.ids[name] = found.get(name)
+
+    def __getitem__(self, name):
+        return self.ids[name]
+
+
+class Importer:
+    def __init__(self, batch_size=5000, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.authors = Lookup(User.objects.all(), "username")
+        self.groups = Lookup(Group.objects.all(), "slug")
+        self.text_field = PostForm.base_fields["text"]
+        self.group_required = PostForm.base_fields["group"].required
+        self.now = timezone.now()
+        self.imported = 0
+        # (номер строки, причина) для отклоненных строк.
+        self.rejected = []
+
+    def run(self, lines):
+        """Загружает посты из итерируемых строк; вернет число постов."""
+        started = time.perf_counter()
+        posts = self.posts(lines)
+        with explicit_pub_date():
+            while True:
+                batch = list(itertools.islice(posts, self.batch_size))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    insert_posts(batch)
+                self.imported += len(batch)
+                if self.progress:
+                    self.progress(Post._meta.verbose_name_plural,
+                                  self.imported,
+                                  time.perf_counter() - started)
+        if self.imported:
+            # Авторов и сообществ может быть сколько угодно: сдвигаем все.
+            feed_cache.bump(feed_cache.SITE)
+        return self.imported
+
+    def posts(self, lines):
+        numbered = enumerate(lines, start=1)
+        while True:
+            chunk = list(itertools.islice(numbered, self.batch_size))
+            if not chunk:
+                return
+            rows = list(self.parse(chunk))
+            for lookup, key in ((self.authors, "author"),
+                                (self.groups, "group")):
+                lookup.load(row[key] for _, row in rows
+                            if isinstance(row.get(key), str))
+            for number, row in rows:
+                try:
+                    yield self.build(row)
+                except ValidationError as exc:
+                    self.rejected.append((number, "; ".join(exc.messages)))
+
+    def parse(self, chunk):
+        for number, line in chunk:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError("ожидается объект JSON")
+            except ValueError as exc:
+                self.rejected.append((number, f"JSON: {exc}"))
+                continue
+            yield number, row
+
+    def build(self, row):
+        text = self.text_field.clean(row.get("text"))
+        author = row.get("author")
+        author_id = self.authors[author] if isinstance(author, str) else None
+        if author_id is None:
+            raise ValidationError(f"Нет автора {author!r}")
+        group = row.get("group")
+        group_id = None
+        if group:
+            group_id = self.groups[group] if isinstance(group, str) else None
+            if group_id is None:
+                raise ValidationError(f"Нет сообщества {group!r}")
+        elif self.group_required:
+            raise ValidationError("Не указано сообщество")
+        pub_date = self.now
+        if row.get("pub_date"):
+            try:
+                pub_date = datetime.fromisoformat(str(row["pub_date"]))
+            except ValueError:
+                raise ValidationError(
+                    f"Неверная дата {row['pub_date']!r}")
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        return Post(text=text, text_html=render_text(text),
+                    author_id=author_id, group_id=group_id,
+                    pub_date=pub_date)
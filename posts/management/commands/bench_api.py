@@ -0,0 +1,106 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.benchmark import run_concurrent, summarize
+from posts.models import Post
+from posts.seeding import seed
+
+
+class Command(BaseCommand):
+    help = ("Сравнивает JSON API лент с HTML-страницами: задержки, RPS, "
+            "запросы к БД и размер ответа в формате JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts", type=int, default=10000,
+            help="Досоздать постов до этого числа перед прогоном")
+        parser.add_argument(
+            "--requests", type=int, default=200,
+            help="Запросов на каждую страницу")
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--fields", default="id,text,pub_date,author",
+            help="?fields= для варианта api_fields")
+        parser.add_argument(
+            "--cache", action="store_true",
+            help="Не отключать кэш страниц лент на время прогона")
+        parser.add_argument(
+            "--output", help="Файл для JSON; по умолчанию stdout")
+
+    def handle(self, *args, **options):
+        missing = options["posts"] - Post.objects.count()
+        if missing > 0:
+            self.stderr.write(f"Создаю {missing} постов...")
+            seed(missing)
+        results = []
+        settings = {} if options["cache"] else {"FEED_CACHE_TIMEOUT": 0}
+        with override_settings(**settings):
+            for name, urls in self.pages(options["fields"]).items():
+                for variant, url in urls.items():
+                    size = len(Client().get(url).content)
+                    samples, wall = run_concurrent(
+                        self.client_call(url), options["requests"],
+                        options["concurrency"])
+                    results.append({"page": name, "variant": variant,
+                                    "bytes": size,
+                                    **summarize(samples, wall)})
+                    self.stderr.write(f"{name} {variant}: готово")
+        report = json.dumps({
+            "meta": {
+                "created": timezone.now().isoformat(),
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "posts": Post.objects.count(),
+                "concurrency": options["concurrency"],
+                "feed_cache": options["cache"],
+            },
+            "results": results,
+        }, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
+
+    def pages(self, fields):
+        post = Post.objects.exclude(group=None).select_related(
+            "author", "group").order_by("pk").first()
+        if post is None:
+            post = Post.objects.select_related("author").order_by(
+                "pk").first()
+        if post is None:
+            raise CommandError("Нет постов для замеров: задайте --posts")
+        username = post.author.username
+        names = {
+            "index": ("index", "api_index", {}),
+            "profile": ("profile", "api_profile", {"username": username}),
+            "post": ("post", "api_post",
+                     {"username": username, "post_id": post.pk}),
+        }
+        if post.group is not None:
+            names["group_posts"] = ("group_posts", "api_group_posts",
+                                    {"slug": post.group.slug})
+        return {
+            name: {
+                "html": reverse(html, kwargs=kwargs),
+                "api": reverse(api, kwargs=kwargs),
+                "api_fields": reverse(api, kwargs=kwargs) + "?fields="
+                + fields,
+            }
+            for name, (html, api, kwargs) in names.items()
+        }
+
+    def client_call(self, url):
+        def make_call():
+            client = Client()
+
+            def call():
+                return client.get(url).status_code < 400
+            return call
+        return make_call
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from django.urls import reverse
+
+from posts.benchmark import summarize
+from posts.models import Post
+from yatube.asgi import AsgiHandler, build_environ, run_wsgi
+
+
+def http_scope(url):
+    parts = urlsplit(url)
+    return {
+        "type": "http", "method": "GET", "path": parts.path,
+        "query_string": parts.query.encode(), "headers": [],
+        "server": ("testserver", 80), "client": ("127.0.0.1", 0),
+    }
+
+
+class Command(BaseCommand):
+    help = ("Сравнивает WSGI и ASGI с тем же числом потоков при медленных "
+            "клиентах: RPS и задержки p50/p95/p99 в формате JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients", type=int, default=64,
+            help="Одновременных клиентов")
+        parser.add_argument("--requests", type=int, default=512)
+        parser.add_argument(
+            "--threads", type=int, default=8,
+            help="Потоков WSGI-сервера и пула AsgiHandler")
+        parser.add_argument(
+            "--client-delay", type=float, default=0.05,
+            help="Сколько секунд клиент читает ответ")
+        parser.add_argument(
+            "--url", action="append",
+            help="Адрес страницы; по умолчанию index, группа и профиль")
+        parser.add_argument(
+            "--no-cache", action="store_true",
+            help="Отключить кэш страниц лент на время прогона")
+
+    def handle(self, *args, **options):
+        urls = options["url"] or self.default_urls()
+        timeout = 0 if options["no_cache"] else None
+        settings = (override_settings(FEED_CACHE_TIMEOUT=timeout)
+                    if timeout is not None else override_settings())
+        wsgi = get_wsgi_application()
+        results = []
+        with settings:
+            for mode in ("wsgi", "asgi"):
+                samples, wall = asyncio.run(
+                    self.run(mode, wsgi, urls, options))
+                summary = summarize(samples, wall)
+                del summary["queries_per_request"]
+                results.append({"server": mode, **summary})
+                self.stderr.write(f"{mode}: готово")
+        self.stdout.write(json.dumps({
+            "meta": {key: options[key] for key in (
+                "clients", "requests", "threads", "client_delay")},
+            "urls": urls,
+            "results": results,
+        }, ensure_ascii=False, indent=2))
+
+    def default_urls(self):
+        post = Post.objects.exclude(group=None).select_related(
+            "author", "group").order_by("pk").first()
+        if post is None:
+            return [reverse("index")]
+        return [
+            reverse("index"),
+            reverse("group_posts", kwargs={"slug": post.group.slug}),
+            reverse("profile", kwargs={"username": post.author.username}),
+        ]
+
+    def wsgi_server(self, wsgi, threads, delay):
+        executor = ThreadPoolExecutor(max_workers=threads)
+
+        def serve(scope):
+            # Синхронный воркер занят, пока клиент читает ответ.
+            sent = []
+            run_wsgi(wsgi, build_environ(scope, b""), sent.append)
+            status = sent[0][0]
+            time.sleep(delay)
+            return status
+
+        async def request(scope):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, serve, scope)
+        return request, executor
+
+    def asgi_server(self, wsgi, threads, delay):
+        handler = AsgiHandler(wsgi, threads=threads)
+
+        async def request(scope):
+            sent = {}
+
+            async def receive():
+                return {"type": "http.request", "body": b""}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    sent["status"] = message["status"]
+                else:
+                    await asyncio.sleep(delay)
+
+            await handler(scope, receive, send)
+            return sent["status"]
+        return request, handler.executor
+
+    async def run(self, mode, wsgi, urls, options):
+        server = self.wsgi_server if mode == "wsgi" else self.asgi_server
+        request, executor = server(
+            wsgi, options["threads"], options["client_delay"])
+        samples = []
+        queue = asyncio.Queue()
+        for i in range(options["requests"]):
+            queue.put_nowait(http_scope(urls[i % len(urls)]))
+
+        async def client():
+            while not queue.empty():
+                scope = queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    ok = await request(scope) < 400
+                except Exception:
+                    ok = False
+                samples.append((time.perf_counter() - started, 0, ok))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(options["clients"])))
+        wall = time.perf_counter() - started
+        executor.shutdown()
+        return samples, wall
@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts.models import Post
+from posts.paginator import FEED_ORDERING
+from posts.seeding import seed
+
+PER_PAGE = 10
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Показывает EXPLAIN QUERY PLAN и время запросов лент "
+            "без индексов для лент и с ними")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts", type=int, default=0,
+            help="Досоздать постов до этого числа перед замерами")
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Сколько раз выполнять каждый запрос")
+        parser.add_argument(
+            "--deep-page", type=int, default=1000,
+            help="Номер глубокой страницы для замера OFFSET")
+
+    def handle(self, *args, **options):
+        missing = options["posts"] - Post.objects.count()
+        if missing > 0:
+            self.stdout.write(f"Создаю {missing} постов...")
+            seed(missing, users=max(missing // 100, 1),
+                 groups=max(missing // 10000, 1))
+        sample = Post.objects.exclude(group=None).order_by("pk").first()
+        if sample is None:
+            self.stderr.write("Нет постов с сообществом, задайте --posts")
+            return
+        feeds = self.feeds(sample, options["deep_page"])
+        try:
+            with transaction.atomic():
+                # В SQLite DDL транзакционен: индексы вернутся при откате.
+                quote_name = connection.ops.quote_name
+                with connection.cursor() as cursor:
+                    for index in Post._meta.indexes:
+                        cursor.execute(f"DROP INDEX {quote_name(index.name)}")
+                self.report("Без индексов лент", feeds, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+        self.report("С индексами лент", feeds, options["repeat"])
+
+    def feeds(self, sample, deep_page):
+        feed = Post.objects.feed().order_by(*FEED_ORDERING)
+        offset = (deep_page - 1) * PER_PAGE
+        return {
+            "index": feed[:PER_PAGE],
+            "index deep page": feed[offset:offset + PER_PAGE],
+            "index keyset": feed.filter(
+                pub_date__lt=sample.pub_date)[:PER_PAGE],
+            "group": feed.filter(group_id=sample.group_id)[:PER_PAGE],
+            "profile": feed.filter(author_id=sample.author_id)[:PER_PAGE],
+        }
+
+    def report(self, title, feeds, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in feeds.items():
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            self.stdout.write(f"{name}: {best * 1000:.2f} мс")
+            self.stdout.write(queryset.explain())
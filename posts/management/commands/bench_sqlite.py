@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.benchmark import summarize
+from yatube.sqlite_backend.base import apply_pragmas
+
+SCHEMA = (
+    "CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT NOT NULL,"
+    " pub_date REAL NOT NULL, author_id INTEGER NOT NULL)",
+    "CREATE INDEX post_pub_date_id_idx ON post (pub_date DESC, id DESC)",
+)
+# Чтение повторяет первую страницу ленты, запись — new_post.
+READ_SQL = ("SELECT id, text, pub_date FROM post"
+            " ORDER BY pub_date DESC, id DESC LIMIT 10")
+WRITE_SQL = "INSERT INTO post (text, pub_date, author_id) VALUES (?, ?, ?)"
+
+
+def _create(path, rows, pragmas):
+    db = sqlite3.connect(path)
+    apply_pragmas(db, pragmas)
+    with db:
+        for statement in SCHEMA:
+            db.execute(statement)
+        db.executemany(WRITE_SQL, (
+            (f"Пост {i}", time.time() - i, i % 100) for i in range(rows)))
+    db.close()
+
+
+def run_mix(path, pragmas, readers, writers, seconds):
+    """Читатели и писатели в отдельных потоках и соединениях.
+
+    Возвращает замеры по ролям в формате posts.benchmark.summarize
+    и общее время прогона.
+    """
+    samples = {"read": [], "write": []}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(role):
+        db = sqlite3.connect(path)
+        apply_pragmas(db, pragmas)
+        local = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            ok = True
+            try:
+                if role == "read":
+                    db.execute(READ_SQL).fetchall()
+                else:
+                    with db:
+                        db.execute(WRITE_SQL, ("Новый пост", time.time(), 1))
+            except sqlite3.OperationalError:
+                ok = False
+            local.append((time.perf_counter() - started, 1, ok))
+        db.close()
+        with lock:
+            samples[role].extend(local)
+
+    threads = [threading.Thread(target=worker, args=("read",))
+               for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=("write",))
+                for _ in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = ("Сравнивает чтение ленты под конкурентной записью в SQLite "
+            "без PRAGMA и с PRAGMA из настроек базы default")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--seconds", type=float, default=5)
+        parser.add_argument(
+            "--output", help="Файл для JSON; по умолчанию stdout")
+
+    def handle(self, *args, **options):
+        profiles = {
+            "default": {},
+            "tuned": settings.DATABASES["default"].get("PRAGMAS", {}),
+        }
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas in profiles.items():
+                path = os.path.join(directory, f"{name}.sqlite3")
+                _create(path, options["rows"], pragmas)
+                samples, wall = run_mix(
+                    path, pragmas, options["readers"], options["writers"],
+                    options["seconds"])
+                for role, role_samples in samples.items():
+                    summary = summarize(role_samples, wall)
+                    del summary["queries_per_request"]
+                    results.append({"profile": name, "role": role, **summary})
+                self.stderr.write(f"{name}: готово")
+        report = json.dumps({
+            "meta": {
+                "sqlite": sqlite3.sqlite_version,
+                "rows": options["rows"],
+                "readers": options["readers"],
+                "writers": options["writers"],
+                "seconds": options["seconds"],
+                "pragmas": profiles["tuned"],
+            },
+            "results": results,
+        }, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
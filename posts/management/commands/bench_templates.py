@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template import RequestContext
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory, override_settings
+
+from posts import timeline
+from posts.benchmark import percentile
+from posts.models import Post
+from posts.paginator import paginate
+from posts.seeding import seed
+from posts.views import POSTS_PER_PAGE
+from yatube.warmup import production_templates, template_names
+
+
+def build_engine(name, params):
+    params = {**params, "NAME": name, "OPTIONS": dict(params["OPTIONS"])}
+    params.pop("BACKEND")
+    return DjangoTemplates(params).engine
+
+
+class Command(BaseCommand):
+    help = ("Время рендера index.html с 10 постами: шаблоны из текущих "
+            "настроек и из yatube.production_settings с прогревом")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts", type=int, default=POSTS_PER_PAGE,
+            help="Досоздать постов до этого числа перед замерами")
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        missing = options["posts"] - Post.objects.count()
+        if missing > 0:
+            seed(missing, users=10, groups=2)
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        # Одна страница: замеряется шаблон, а не длина списка страниц.
+        paginator, page = paginate(
+            request, timeline.entries(), POSTS_PER_PAGE, POSTS_PER_PAGE,
+            timeline.ORDERING)
+        timeline.hydrate(page)
+        context = {"page": page, "paginator": paginator}
+
+        engines = {
+            "текущие настройки": build_engine(
+                "current", settings.TEMPLATES[0]),
+            "production_settings": build_engine(
+                "production", production_templates(settings.TEMPLATES)[0]),
+        }
+        warm = engines["production_settings"]
+        for name in template_names(warm):
+            warm.get_template(name)
+
+        # Без кэша фрагментов: карточки постов рендерятся каждый раз.
+        dummy = {"default": {
+            "BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+        with override_settings(CACHES=dummy):
+            for title, engine in engines.items():
+                timings = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    # Как render(): шаблон ищется заново на каждый запрос.
+                    engine.get_template("index.html").render(
+                        RequestContext(request, context))
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f"{title}: p50 {percentile(timings, 0.5):.3f} мс, "
+                    f"p95 {percentile(timings, 0.95):.3f} мс, "
+                    f"первый рендер {timings[0]:.3f} мс")
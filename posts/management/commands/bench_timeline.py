@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Post, TimelineEntry
+from posts.paginator import FEED_ORDERING
+from posts.seeding import seed
+
+PER_PAGE = 10
+
+
+class Command(BaseCommand):
+    help = ("Сравнивает выборку страниц лент из posts_post и из "
+            "материализованной ленты TimelineEntry")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts", type=int, default=0,
+            help="Досоздать постов до этого числа перед замерами")
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Сколько раз выполнять каждую выборку")
+        parser.add_argument(
+            "--deep-page", type=int, default=1000,
+            help="Номер глубокой страницы для замера OFFSET")
+
+    def handle(self, *args, **options):
+        missing = options["posts"] - Post.objects.count()
+        if missing > 0:
+            self.stdout.write(f"Создаю {missing} постов...")
+            seed(missing, users=max(missing // 100, 1),
+                 groups=max(missing // 10000, 1))
+        if TimelineEntry.objects.count() != Post.objects.count():
+            self.stdout.write("Перестраиваю ленту...")
+            timeline.rebuild()
+        sample = Post.objects.exclude(group=None).order_by("pk").first()
+        if sample is None:
+            self.stderr.write("Нет постов с сообществом, задайте --posts")
+            return
+        offset = (options["deep_page"] - 1) * PER_PAGE
+        feeds = {
+            "index": {},
+            "group": {"group_id": sample.group_id},
+            "profile": {"author_id": sample.author_id},
+        }
+        pages = {
+            "": slice(0, PER_PAGE),
+            " deep page": slice(offset, offset + PER_PAGE),
+        }
+        for name, filters in feeds.items():
+            for suffix, window in pages.items():
+                posts = Post.objects.feed().filter(**filters).order_by(
+                    *FEED_ORDERING)
+                entries = timeline.entries(**filters).order_by(
+                    *timeline.ORDERING)
+                self.stdout.write(self.style.MIGRATE_HEADING(name + suffix))
+                self.report("posts_post", posts[window], options["repeat"],
+                            lambda rows: rows)
+                self.report("timeline", entries[window], options["repeat"],
+                            self.hydrate)
+
+    def hydrate(self, entries):
+        ids = [entry.pk for entry in entries]
+        posts = Post.objects.feed().in_bulk(ids)
+        return [posts[pk] for pk in ids]
+
+    def report(self, title, queryset, repeat, load):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            load(list(queryset.all()))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(f"{title}: {best * 1000:.2f} мс")
+        self.stdout.write(queryset.explain())
@@ -0,0 +1,127 @@
+import json
+import platform
+from itertools import count
+
+import django
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.benchmark import run_concurrent, summarize
+from posts.models import Group, Post, User
+from posts.seeding import seed
+
+BENCH_USERNAME = "bench_user"
+
+
+class Command(BaseCommand):
+    help = ("Нагрузочный прогон страниц posts.urls: задержки p50/p95/p99, "
+            "RPS и запросы к БД на запрос в формате JSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--groups", type=int, default=10)
+        parser.add_argument(
+            "--posts", type=int, default=10000,
+            help="Досоздать постов до этого числа перед прогоном")
+        parser.add_argument(
+            "--requests", type=int, default=200,
+            help="Запросов на каждую страницу и уровень конкурентности")
+        parser.add_argument(
+            "--concurrency", default="1,4,16",
+            help="Уровни конкурентности через запятую")
+        parser.add_argument(
+            "--no-cache", action="store_true",
+            help="Отключить кэш страниц лент на время прогона")
+        parser.add_argument(
+            "--output", help="Файл для JSON; по умолчанию stdout")
+
+    def handle(self, *args, **options):
+        missing = options["posts"] - Post.objects.count()
+        if missing > 0:
+            self.stderr.write(f"Создаю {missing} постов...")
+            seed(missing, users=options["users"], groups=options["groups"])
+        pages = self.pages()
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        timeout = 0 if options["no_cache"] else None
+        results = []
+        for name, (anonymous, request) in pages.items():
+            for level in levels:
+                with self.cache_settings(timeout):
+                    samples, wall = run_concurrent(
+                        self.client_call(anonymous, request),
+                        options["requests"], level)
+                results.append(
+                    {"url": name, "concurrency": level,
+                     **summarize(samples, wall)})
+                self.stderr.write(f"{name} x{level}: готово")
+        report = json.dumps({
+            "meta": {
+                "created": timezone.now().isoformat(),
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "posts": Post.objects.count(),
+                "users": User.objects.count(),
+                "groups": Group.objects.count(),
+                "feed_cache": not options["no_cache"],
+            },
+            "results": results,
+        }, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
+
+    def cache_settings(self, timeout):
+        if timeout is None:
+            return override_settings()
+        return override_settings(FEED_CACHE_TIMEOUT=timeout)
+
+    def pages(self):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        post = Post.objects.filter(author=user).first() or Post.objects.create(
+            author=user, text="Пост для замеров")
+        sample = Post.objects.exclude(group=None).select_related(
+            "author", "group").order_by("pk").first()
+        counter = count()
+
+        def get(url):
+            return lambda client: client.get(url)
+
+        def post_form(url, data):
+            def request(client):
+                return client.post(url, {**data, "text": data["text"].format(
+                    next(counter))})
+            return request
+
+        edit_url = reverse("post_edit", kwargs={
+            "username": user.username, "post_id": post.pk})
+        pages = {
+            "index": (True, get(reverse("index"))),
+            "group_list": (True, get(reverse("group_list"))),
+            "profile": (True, get(reverse(
+                "profile", kwargs={"username": user.username}))),
+            "post": (True, get(reverse("post", kwargs={
+                "username": user.username, "post_id": post.pk}))),
+            "new_post": (False, post_form(
+                reverse("new_post"), {"text": "Нагрузочный пост {}"})),
+            "post_edit": (False, post_form(
+                edit_url, {"text": "Правка под нагрузкой {}"})),
+        }
+        if sample is not None:
+            pages["group_posts"] = (True, get(reverse(
+                "group_posts", kwargs={"slug": sample.group.slug})))
+        return pages
+
+    def client_call(self, anonymous, request):
+        def make_call():
+            client = Client()
+            if not anonymous:
+                client.force_login(User.objects.get(username=BENCH_USERNAME))
+
+            def call():
+                return request(client).status_code < 400
+            return call
+        return make_call
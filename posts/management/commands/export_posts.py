@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import CHUNK_SIZE, FORMATS, export_rows, iter_export
+
+
+class Command(BaseCommand):
+    help = ("Выгружает посты с автором и сообществом в JSON Lines или CSV "
+            "потоком, не загружая таблицу в память")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=FORMATS, default="jsonl")
+        parser.add_argument("--group", help="slug сообщества")
+        parser.add_argument("--author", help="username автора")
+        parser.add_argument(
+            "--since", help="Дата публикации от (включительно), ISO")
+        parser.add_argument(
+            "--until", help="Дата публикации до (не включая), ISO")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            "--output", help="Файл для выгрузки; по умолчанию stdout")
+
+    def handle(self, *args, **options):
+        try:
+            rows = export_rows(
+                group=options["group"], author=options["author"],
+                since=options["since"], until=options["until"],
+                chunk_size=options["chunk_size"])
+        except ValueError as exc:
+            raise CommandError(exc)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8",
+                      newline="") as output:
+                output.writelines(iter_export(options["format"], rows))
+        else:
+            for line in iter_export(options["format"], rows):
+                self.stdout.write(line, ending="")
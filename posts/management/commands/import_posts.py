@@ -0,0 +1,49 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import Importer
+
+# Сколько отклоненных строк показывать в отчете.
+SHOW_REJECTED = 20
+
+
+class Command(BaseCommand):
+    help = ("Загружает посты из файла JSON Lines пачками bulk_create; "
+            "формат строк совместим с export_posts")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл JSON Lines или - для stdin")
+        parser.add_argument(
+            "--batch-size", type=int, default=5000,
+            help="Строк в одной транзакции bulk_create")
+
+    def handle(self, *args, **options):
+        self.last_report = 0
+        importer = Importer(options["batch_size"], progress=self.progress)
+        started = time.perf_counter()
+        try:
+            if options["path"] == "-":
+                importer.run(sys.stdin)
+            else:
+                with open(options["path"], encoding="utf-8") as lines:
+                    importer.run(lines)
+        except OSError as exc:
+            raise CommandError(exc)
+        elapsed = time.perf_counter() - started
+        for number, reason in sorted(importer.rejected)[:SHOW_REJECTED]:
+            self.stderr.write(f"строка {number}: {reason}")
+        rate = importer.imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено постов: {importer.imported}, отклонено строк: "
+            f"{len(importer.rejected)}, {elapsed:.1f} с ({rate:.0f} строк/с)"))
+
+    def progress(self, name, created, elapsed):
+        # Не чаще раза в секунду, чтобы вывод не тормозил вставку.
+        now = time.perf_counter()
+        if now - self.last_report < 1:
+            return
+        self.last_report = now
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(f"{name}: {created} ({rate:.0f} строк/с)")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_all
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счетчики постов (всего, по сообществам и авторам)"
+
+    def handle(self, *args, **options):
+        written = recount_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Счетчики постов пересчитаны: {written}"))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.seeding import seed
+
+
+class Command(BaseCommand):
+    help = ("Заполняет базу синтетическими пользователями, сообществами "
+            "и постами для нагрузочного тестирования")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--posts", type=int, default=1000000)
+        parser.add_argument(
+            "--batch-size", type=int, default=5000,
+            help="Строк в одной транзакции bulk_create")
+        parser.add_argument(
+            "--seed", type=int, default=42,
+            help="Зерно генератора случайных чисел")
+        parser.add_argument(
+            "--days", type=int, default=365,
+            help="За сколько последних дней распределить посты")
+
+    def handle(self, *args, **options):
+        self.last_report = 0
+        started = time.perf_counter()
+        seed(options["posts"], users=options["users"],
+             groups=options["groups"], batch_size=options["batch_size"],
+             seed=options["seed"], days=options["days"],
+             progress=self.progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово за {time.perf_counter() - started:.1f} с"))
+
+    def progress(self, name, created, elapsed):
+        # Не чаще раза в секунду, чтобы вывод не тормозил вставку.
+        now = time.perf_counter()
+        if now - self.last_report < 1:
+            return
+        self.last_report = now
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(f"{name}: {created} ({rate:.0f} строк/с)")
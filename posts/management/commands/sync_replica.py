@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ("Копирует базу default в файлы реплик SQLite из "
+            "REPLICA_DATABASES: локальная замена репликации")
+
+    def handle(self, *args, **options):
+        aliases = getattr(settings, "REPLICA_DATABASES", [])
+        if not aliases:
+            raise CommandError(
+                "Реплики не настроены: задайте YATUBE_REPLICA_DB")
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite":
+            raise CommandError("Команда работает только с SQLite")
+        source = sqlite3.connect(primary.settings_dict["NAME"])
+        try:
+            for alias in aliases:
+                target = sqlite3.connect(
+                    connections[alias].settings_dict["NAME"])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"{alias}: скопировано")
+        finally:
+            source.close()
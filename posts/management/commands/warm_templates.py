@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from yatube.warmup import warm_up_templates
+
+
+class Command(BaseCommand):
+    help = ("Компилирует все шаблоны проекта и сообщает о тех, "
+            "что не собираются")
+
+    def handle(self, *args, **options):
+        compiled, errors, seconds = warm_up_templates()
+        for name, error in errors.items():
+            self.stderr.write(f"{name}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Скомпилировано шаблонов: {compiled} за {seconds * 1000:.0f} мс"))
+        if errors:
+            raise CommandError(f"Не собираются шаблоны: {len(errors)}")
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    PostCount = apps.get_model("posts", "PostCount")
+    counters = [PostCount(scope="total", value=Post.objects.count())]
+    for scope in ("group", "author"):
+        rows = (Post.objects.exclude(**{f"{scope}__isnull": True})
+                .values(scope).annotate(value=Count("pk")).order_by())
+        counters.extend(
+            PostCount(scope=scope, object_id=row[scope], value=row["value"])
+            for row in rows
+        )
+    PostCount.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_auto_20210117_0035'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('total', 'Всего'), ('group', 'Сообщество'), ('author', 'Автор')], max_length=10, verbose_name='Область')),
+                ('object_id', models.PositiveIntegerField(default=0, verbose_name='id сообщества или автора')),
+                ('value', models.IntegerField(default=0, verbose_name='Записей')),
+            ],
+            options={
+                'verbose_name': 'Счетчик постов',
+                'verbose_name_plural': 'Счетчики постов',
+                'unique_together': {('scope', 'object_id')},
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+from posts.models import render_text
+
+BATCH_SIZE = 1000
+
+
+def render_existing(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    last_pk = 0
+    while True:
+        batch = list(Post.objects.filter(pk__gt=last_pk).order_by("pk")
+                     .only("pk", "text")[:BATCH_SIZE])
+        if not batch:
+            break
+        for post in batch:
+            post.text_html = render_text(post.text)
+        Post.objects.bulk_update(batch, ["text_html"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_postcount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, help_text='Заполняется из текста при сохранении', verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_timeline(apps, schema_editor):
+    quote_name = schema_editor.quote_name
+    entries = apps.get_model("posts", "TimelineEntry")._meta.db_table
+    posts = apps.get_model("posts", "Post")._meta.db_table
+    schema_editor.execute(
+        f"INSERT INTO {quote_name(entries)}"
+        " (post_id, pub_date, author_id, group_id)"
+        " SELECT id, pub_date, author_id, group_id"
+        f" FROM {quote_name(posts)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_post_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='timeline_entry', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group', verbose_name='Сообщество')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['-pub_date', '-post'], name='timeline_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['group', '-pub_date', '-post'], name='timeline_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['author', '-pub_date', '-post'], name='timeline_author_idx'),
+        ),
+        migrations.RunPython(fill_timeline, migrations.RunPython.noop),
+        # Ленты по сообществу и автору теперь читают timeline_*_idx.
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_group_pub_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_author_pub_date_idx',
+        ),
+    ]
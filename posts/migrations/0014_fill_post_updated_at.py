@@ -0,0 +1,31 @@
+from django.db import migrations, transaction
+from django.db.models import F, Max
+
+BATCH_SIZE = 5000
+
+
+def fill_updated_at(apps, schema_editor):
+    # Каждая пачка — своя короткая транзакция: таблица не блокируется
+    # на все время заполнения.
+    Post = apps.get_model("posts", "Post")
+    last_pk = Post.objects.aggregate(last=Max("pk"))["last"] or 0
+    for start in range(0, last_pk, BATCH_SIZE):
+        with transaction.atomic(using=schema_editor.connection.alias):
+            Post.objects.filter(
+                pk__gt=start, pk__lte=start + BATCH_SIZE,
+                updated_at__isnull=True,
+            ).update(updated_at=F("pub_date"))
+
+
+class Migration(migrations.Migration):
+    # Без общей транзакции: иначе пачки fill_updated_at не коммитились бы
+    # по отдельности. Изменения схемы — в соседних атомарных миграциях.
+    atomic = False
+
+    dependencies = [
+        ('posts', '0013_post_updated_at_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
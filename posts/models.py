@@ -1,9 +1,39 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.template.defaultfilters import linebreaksbr
 
 User = get_user_model()
 
 
+def render_text(text):
+    """HTML текста поста: то же, что фильтр linebreaksbr в шаблоне."""
+    return str(linebreaksbr(text, autoescape=True))
+
+
+class GroupQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Добавляет posts_count и last_pub_date одним запросом.
+
+        Число постов берется из счетчика, а для сообщества без счетчика
+        (например, пустого) считается COUNT по индексу group_id.
+        """
+        counter = PostCount.objects.filter(
+            scope=PostCount.GROUP, object_id=models.OuterRef("pk"),
+        ).values("value")[:1]
+        recount = Post.objects.filter(group=models.OuterRef("pk")).order_by(
+        ).values("group").annotate(value=models.Count("pk")).values("value")
+        latest = TimelineEntry.objects.filter(
+            group=models.OuterRef("pk"),
+        ).order_by("-pub_date").values("pub_date")[:1]
+        return self.annotate(
+            posts_count=Coalesce(
+                models.Subquery(counter), models.Subquery(recount), 0,
+                output_field=models.IntegerField()),
+            last_pub_date=models.Subquery(latest),
+        )
+
+
 class Group(models.Model):
     title = models.CharField(
         max_length=200, verbose_name="Имя сообщества",
@@ -15,6 +45,8 @@ class Group(models.Model):
         unique=True, verbose_name="Адрес",
         help_text="Уникальный адрес группы, он будет частью URL")
 
+    objects = GroupQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Сообщество"
         verbose_name_plural = "Сообщества"
@@ -23,12 +55,41 @@ class Group(models.Model):
         return str(self.title)
 
 
+class PostQuerySet(models.QuerySet):
+    # Колонки, которые реально выводят шаблоны ленты: текст они берут
+    # из text_html, поэтому исходный text не читается.
+    FEED_FIELDS = (
+        "text_html", "pub_date", "version", "author", "group",
+        "author__username", "author__first_name", "author__last_name",
+        "group__title", "group__slug",
+    )
+
+    def feed(self):
+        """Посты для ленты: автор и сообщество одним JOIN, без лишних полей."""
+        return self.select_related("author", "group").only(*self.FEED_FIELDS)
+
+    def with_author_count(self):
+        """Добавляет author_posts_count из счетчика постов автора."""
+        counter = PostCount.objects.filter(
+            scope=PostCount.AUTHOR, object_id=models.OuterRef("author_id"),
+        ).values("value")[:1]
+        return self.annotate(author_posts_count=models.Subquery(counter))
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name="Текст", help_text="Содержание поста")
+    text_html = models.TextField(
+        editable=False, blank=True, verbose_name="Текст в HTML",
+        help_text="Заполняется из текста при сохранении")
     pub_date = models.DateTimeField(
         "Дата публикации", auto_now_add=True,
         help_text="Введите дату. По умолчанию будет присвоена текущая.")
+    updated_at = models.DateTimeField(
+        "Дата изменения", auto_now=True, db_index=True)
+    version = models.PositiveIntegerField(
+        "Версия", default=1, editable=False,
+        help_text="Растет на единицу при каждом сохранении")
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="posts",
         verbose_name="Автор", help_text="Кто написал этот пост?")
@@ -37,10 +98,110 @@ class Post(models.Model):
         related_name="posts", verbose_name="Сообщество",
         help_text="К какому сообществу отнести этот пост?")
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
         ordering = ['-pub_date']
+        # Ленты читают индексы TimelineEntry; этот нужен сортировке по
+        # умолчанию (админка, поиск без FTS5).
+        indexes = [
+            models.Index(fields=["-pub_date", "-id"],
+                         name="post_pub_date_id_idx"),
+        ]
 
     def __str__(self):
         return str(self.text[:15])
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Текст, из которого собран загруженный text_html.
+        post._rendered_text = post.__dict__.get("text")
+        return post
+
+    def save(self, *args, **kwargs):
+        if "text" in self.__dict__ and (
+                self.text != getattr(self, "_rendered_text", None)
+                or "text_html" not in self.__dict__):
+            self.text_html = render_text(self.text)
+            self._rendered_text = self.text
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None and self.get_deferred_fields():
+            # Django сохранил бы только загруженные поля, без даты изменения.
+            update_fields = {
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname in self.__dict__}
+        if update_fields is not None:
+            text_html = ("text_html",) if "text" in update_fields else ()
+            kwargs["update_fields"] = {
+                *update_fields, *text_html, "updated_at"}
+        using = kwargs.get("using") or router.db_for_write(
+            Post, instance=self)
+        with transaction.atomic(using=using):
+            # Версия растет отдельным UPDATE в той же транзакции:
+            # параллельные правки не получат одинаковую, а post_save
+            # уже видит новое значение.
+            rows = Post.objects.using(using).filter(pk=self.pk)
+            if rows.update(version=models.F("version") + 1):
+                self.version = rows.values_list("version", flat=True).get()
+            super().save(*args, **kwargs)
+
+
+class TimelineEntry(models.Model):
+    """Строка ленты: ключи поста без текста, см. posts/timeline.py."""
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True,
+        related_name="timeline_entry", verbose_name="Пост")
+    pub_date = models.DateTimeField("Дата публикации")
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+", db_index=False,
+        verbose_name="Автор")
+    group = models.ForeignKey(
+        Group, on_delete=models.SET_NULL, blank=True, null=True,
+        related_name="+", db_index=False, verbose_name="Сообщество")
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        # Индексы покрывают выборку страницы: pub_date и post_id.
+        indexes = [
+            models.Index(fields=["-pub_date", "-post"],
+                         name="timeline_pub_date_idx"),
+            models.Index(fields=["group", "-pub_date", "-post"],
+                         name="timeline_group_idx"),
+            models.Index(fields=["author", "-pub_date", "-post"],
+                         name="timeline_author_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.pub_date:%Y-%m-%d %H:%M} #{self.post_id}"
+
+
+class PostCount(models.Model):
+    """Счетчик постов: всего на сайте, в сообществе или у автора."""
+    TOTAL = "total"
+    GROUP = "group"
+    AUTHOR = "author"
+    SCOPES = (
+        (TOTAL, "Всего"),
+        (GROUP, "Сообщество"),
+        (AUTHOR, "Автор"),
+    )
+
+    scope = models.CharField(
+        max_length=10, choices=SCOPES, verbose_name="Область")
+    object_id = models.PositiveIntegerField(
+        default=0, verbose_name="id сообщества или автора")
+    value = models.IntegerField(default=0, verbose_name="Записей")
+
+    class Meta:
+        verbose_name = "Счетчик постов"
+        verbose_name_plural = "Счетчики постов"
+        unique_together = ("scope", "object_id")
+
+    def __str__(self):
+        return f"{self.scope}:{self.object_id}={self.value}"
@@ -0,0 +1,132 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Порядок ленты: ключ (pub_date, id) однозначен даже при совпадении дат.
+FEED_ORDERING = ("-pub_date", "-pk")
+# Сколько соседних страниц показывать по обе стороны от текущей.
+PAGE_WINDOW = 2
+
+
+def page_window(number, num_pages, around=PAGE_WINDOW, edges=1):
+    """Номера страниц для навигации без полного page_range.
+
+    Первые и последние `edges` страниц и текущая ±`around`; на месте
+    пропуска стоит None. Пропуск в одну страницу заменяется ее номером.
+    """
+    number = min(max(number, 1), num_pages)
+    spans = (
+        (1, min(edges, num_pages)),
+        (max(number - around, 1), min(number + around, num_pages)),
+        (max(num_pages - edges + 1, 1), num_pages),
+    )
+    window = []
+    last = 0
+    for start, stop in spans:
+        start = max(start, last + 1)
+        if start > stop:
+            continue
+        if start - last == 2:
+            window.append(last + 1)
+        elif start - last > 2:
+            window.append(None)
+        window.extend(range(start, stop + 1))
+        last = stop
+    return window
+
+
+def encode_cursor(post, number):
+    """Курсор на пост: дата, id и номер страницы, которую он открывает."""
+    raw = f"{post.pub_date.isoformat()}|{post.pk}|{number}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    """Разбирает курсор; для битого или пустого значения вернет None."""
+    if not value:
+        return None
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        pub_date, pk, number = raw.split("|")
+        pub_date = parse_datetime(pub_date)
+        pk, number = int(pk), int(number)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk, max(number, 1)
+
+
+def _keyset_page(paginator, cursor, forward):
+    """Страница после (forward) или до курсора без OFFSET."""
+    pub_date, pk, number = cursor
+    queryset = paginator.object_list
+    per_page = paginator.per_page
+    if forward:
+        rows = list(queryset.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )[:per_page + 1])
+        has_next = len(rows) > per_page
+        has_previous = True
+        rows = rows[:per_page]
+    else:
+        rows = list(queryset.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        ).reverse()[:per_page + 1])
+        has_previous = len(rows) > per_page
+        has_next = True
+        rows = rows[:per_page][::-1]
+        if not has_previous:
+            number = 1
+    if not rows:
+        return None
+    page = Page(rows, number, paginator)
+    _set_cursors(page, has_previous, has_next)
+    return page
+
+
+def _set_cursors(page, has_previous, has_next):
+    rows = page.object_list
+    page.has_cursors = True
+    page.previous_cursor = (
+        encode_cursor(rows[0], page.number - 1)
+        if rows and has_previous else None
+    )
+    page.next_cursor = (
+        encode_cursor(rows[-1], page.number + 1)
+        if rows and has_next else None
+    )
+
+
+def paginate(request, queryset, per_page, count=None,
+             ordering=FEED_ORDERING):
+    """Возвращает (paginator, page) для ленты постов.
+
+    Ссылки «вперед/назад» ведут по курсору `?after=`/`?before=`,
+    поэтому выборка страницы не зависит от глубины. Старые адреса
+    вида `?page=N` продолжают работать через обычный Paginator.
+    Если число постов уже известно (`count`), COUNT(*) не выполняется.
+    `ordering` — тот же порядок (pub_date, id) в полях другой модели.
+    Номера страниц для навигации лежат в `page.window`.
+    """
+    paginator = Paginator(queryset.order_by(*ordering), per_page)
+    if count is not None:
+        # Paginator.count — cached_property, значение экземпляра главнее.
+        paginator.count = count
+    page = None
+    for param, forward in (("after", True), ("before", False)):
+        cursor = decode_cursor(request.GET.get(param))
+        if cursor is not None:
+            page = _keyset_page(paginator, cursor, forward)
+            if page is not None:
+                break
+    if page is None:
+        page = paginator.get_page(request.GET.get("page"))
+        page.object_list = list(page.object_list)
+        _set_cursors(page, page.has_previous(), page.has_next())
+    page.window = page_window(page.number, paginator.num_pages)
+    return paginator, page
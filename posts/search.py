@@ -0,0 +1,135 @@
+from django.db import OperationalError, connections, router
+
+from .models import Post
+
+FTS_TABLE = "posts_post_fts"
+
+# Внешняя (content=) таблица FTS5: сам текст хранится только в posts_post,
+# индекс поддерживают триггеры. SQLite удаляет их, когда миграция
+# пересобирает posts_post, поэтому после каждого migrate их заново
+# создает install_triggers (см. signals.py).
+FTS_CREATE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+FTS_TRIGGERS = (
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, text) "
+    "VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    "AFTER UPDATE OF text ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+)
+FTS_REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+_fts_available = {}
+
+
+def install_fts(schema_editor):
+    """Создает индекс FTS5 и триггеры; на других СУБД ничего не делает."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        for sql in (FTS_CREATE, *FTS_TRIGGERS, FTS_REBUILD):
+            schema_editor.execute(sql)
+    except OperationalError:
+        # SQLite собран без FTS5: поиск будет работать через LIKE.
+        pass
+    _fts_available.clear()
+
+
+def install_triggers(connection):
+    """Создает недостающие триггеры индекса, не пересобирая его.
+
+    Пересборка таблицы миграцией сохраняет id и текст постов, так что
+    индекс остается верным, пропадают только триггеры.
+    """
+    if (connection.vendor != "sqlite"
+            or FTS_TABLE not in connection.introspection.table_names()):
+        return
+    with connection.cursor() as cursor:
+        for sql in FTS_TRIGGERS:
+            cursor.execute(sql)
+
+
+def fts_enabled(using=None):
+    """Есть ли индекс FTS5 для постов в базе, откуда читаются посты."""
+    connection = connections[using or router.db_for_read(Post)]
+    key = (connection.alias, connection.settings_dict["NAME"])
+    if key not in _fts_available:
+        _fts_available[key] = (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available[key]
+
+
+def match_expression(query):
+    """Запрос пользователя как набор фраз FTS5, объединенных через AND."""
+    terms = query.split()
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def filter_matching(queryset, query):
+    """Оставляет в queryset постов только подходящие под запрос.
+
+    filter(pk__in=RawSQL(...)) в SQLite дает IN ((SELECT ...)), то есть
+    скалярный подзапрос с одной строкой, поэтому условие задано через extra.
+    """
+    return queryset.extra(
+        where=[f"posts_post.id IN (SELECT rowid FROM {FTS_TABLE} "
+               f"WHERE {FTS_TABLE} MATCH %s)"],
+        params=[match_expression(query)],
+    )
+
+
+class SearchResults:
+    """Результаты FTS5 по релевантности; подходят для Paginator.
+
+    Страница выбирается из узкой таблицы индекса, а полные посты
+    загружаются одним запросом только для id этой страницы. Индекс и
+    посты читаются из одной базы using: с реплики, отстающей от основной
+    базы, иначе пропадали бы найденные на основной посты.
+    """
+
+    def __init__(self, query, using):
+        self.match = match_expression(query)
+        self.using = using
+
+    def count(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s", [self.match])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = index.stop - offset
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                "ORDER BY rank LIMIT %s OFFSET %s",
+                [self.match, limit, offset])
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.using(self.using).feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    """Посты, подходящие под запрос: FTS5 на SQLite, иначе LIKE."""
+    using = router.db_for_read(Post)
+    if fts_enabled(using):
+        return SearchResults(query, using)
+    return Post.objects.feed().filter(text__icontains=query)
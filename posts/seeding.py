@@ -0,0 +1,139 @@
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache as feed_cache
+from .batch import insert_posts
+from .models import Group, Post, User, render_text
+
+USER_PREFIX = "seed_user_"
+GROUP_PREFIX = "seed-group-"
+# Доля постов без сообщества и показатель степенного закона для авторов
+# и сообществ: немногие пишут много, большинство — пару постов.
+NO_GROUP_SHARE = 0.3
+SKEW = 1.1
+WORDS = (
+    "сегодня", "вчера", "город", "погода", "кофе", "книга", "кино", "код",
+    "работа", "отпуск", "море", "горы", "друзья", "новости", "музыка",
+    "футбол", "дождь", "солнце", "проект", "идея", "вопрос", "ответ",
+)
+
+
+@contextmanager
+def explicit_pub_date():
+    """Позволяет bulk_create сохранить заданные pub_date.
+
+    У pub_date стоит auto_now_add, и без этого все посты пачки
+    получили бы одно и то же текущее время.
+    """
+    field = Post._meta.get_field("pub_date")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def skewed_weights(size):
+    """Накопленные веса по закону Ципфа для rng.choices(cum_weights=...)."""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** SKEW for rank in range(size)))
+
+
+def _text(rng):
+    words = rng.choices(WORDS, k=max(int(rng.paretovariate(1.5) * 8), 3))
+    lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+    return "\n".join(lines).capitalize()
+
+
+def bulk_insert(model, objects, batch_size, progress=None, insert=None):
+    """bulk_create пачками по batch_size, каждая в своей транзакции.
+
+    insert(пачка) заменяет bulk_create, например insert_posts для постов.
+    """
+    insert = insert or model.objects.bulk_create
+    started = time.perf_counter()
+    created = 0
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            break
+        with transaction.atomic():
+            insert(batch)
+        created += len(batch)
+        if progress:
+            progress(model._meta.verbose_name_plural, created,
+                     time.perf_counter() - started)
+    return created
+
+
+def seed(posts, users=100, groups=10, batch_size=5000, seed=42, days=365,
+         progress=None):
+    """Создает пользователей, сообщества и посты пачками bulk_create.
+
+    Авторы и сообщества выбираются с перекосом по закону Ципфа,
+    даты постов равномерно распределены за последние days дней.
+    При одинаковом seed на пустой базе получаются одни и те же данные.
+    progress(название, создано, секунд) вызывается после каждой пачки.
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+    last_user = User.objects.order_by("-pk").values_list(
+        "pk", flat=True).first() or 0
+    first_user = User.objects.filter(username__startswith=USER_PREFIX).count()
+    bulk_insert(User, (
+        User(username=f"{USER_PREFIX}{first_user + i}", password=password)
+        for i in range(users)
+    ), batch_size, progress)
+    authors = User.objects.order_by("pk")
+    if users:
+        authors = authors.filter(pk__gt=last_user)
+    author_ids = list(authors.values_list("pk", flat=True))
+
+    first_group = Group.objects.filter(slug__startswith=GROUP_PREFIX).count()
+    bulk_insert(Group, (
+        Group(title=f"Сообщество {first_group + i}",
+              slug=f"{GROUP_PREFIX}{first_group + i}",
+              description="Сгенерированное сообщество")
+        for i in range(groups)
+    ), batch_size, progress)
+    group_ids = list(Group.objects.order_by("pk").values_list(
+        "pk", flat=True))
+    if not author_ids or not posts:
+        return
+
+    # Порядок id перемешан, чтобы «плодовитые» не шли подряд по pk.
+    rng.shuffle(author_ids)
+    rng.shuffle(group_ids)
+    author_weights = skewed_weights(len(author_ids))
+    group_weights = skewed_weights(len(group_ids))
+    now = timezone.now()
+    span = days * 24 * 3600
+
+    def generate():
+        for _ in range(posts):
+            text = _text(rng)
+            group_id = None
+            if group_ids and rng.random() >= NO_GROUP_SHARE:
+                group_id = rng.choices(group_ids, cum_weights=group_weights)[0]
+            yield Post(
+                text=text,
+                text_html=render_text(text),
+                author_id=rng.choices(
+                    author_ids, cum_weights=author_weights)[0],
+                group_id=group_id,
+                pub_date=now - timedelta(seconds=rng.random() * span),
+            )
+
+    # Записи ленты и счетчики пишутся вместе с каждой пачкой, как при
+    # import_posts, а не пересчетом всех таблиц в конце.
+    with explicit_pub_date():
+        bulk_insert(Post, generate(), batch_size, progress, insert_posts)
+    feed_cache.bump(feed_cache.SITE)
@@ -0,0 +1,107 @@
+from django.db import connections
+from django.db.models.signals import (
+    post_delete, post_init, post_migrate, post_save,
+)
+from django.dispatch import receiver
+
+from . import cache as feed_cache
+from . import counters
+from . import search
+from . import timeline
+from .models import Group, Post, PostCount, User
+
+
+def _owners(post):
+    # Берем значения из __dict__, чтобы не подгружать отложенные поля.
+    return post.__dict__.get("author_id"), post.__dict__.get("group_id")
+
+
+def _count_saved_post(instance, created, old_owners):
+    author_id, group_id = _owners(instance)
+    if created:
+        counters.bump(PostCount.TOTAL, 0, 1)
+        counters.bump(PostCount.AUTHOR, author_id, 1)
+        if group_id:
+            counters.bump(PostCount.GROUP, group_id, 1)
+        return
+    old_author_id, old_group_id = old_owners
+    if old_author_id and author_id and old_author_id != author_id:
+        counters.bump(PostCount.AUTHOR, old_author_id, -1)
+        counters.bump(PostCount.AUTHOR, author_id, 1)
+    if "group_id" in instance.__dict__ and old_group_id != group_id:
+        if old_group_id:
+            counters.bump(PostCount.GROUP, old_group_id, -1)
+        if group_id:
+            counters.bump(PostCount.GROUP, group_id, 1)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_owners(sender, instance, **kwargs):
+    instance._counted_owners = _owners(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    old_owners = instance._counted_owners
+    _count_saved_post(instance, created, old_owners)
+    timeline.sync(instance, created)
+    feed_cache.invalidate_feeds(
+        (old_owners[1], instance.__dict__.get("group_id")),
+        (old_owners[0], instance.__dict__.get("author_id")))
+    instance._counted_owners = _owners(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    author_id, group_id = instance._counted_owners
+    counters.bump(PostCount.TOTAL, 0, -1)
+    if author_id:
+        counters.bump(PostCount.AUTHOR, author_id, -1)
+    if group_id:
+        counters.bump(PostCount.GROUP, group_id, -1)
+    feed_cache.invalidate_feeds((group_id,), (author_id,))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    # Название сообщества выводится в карточках постов на всех страницах.
+    feed_cache.bump(feed_cache.SITE, feed_cache.group_scope(instance.slug))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    PostCount.objects.filter(
+        scope=PostCount.GROUP, object_id=instance.pk).delete()
+    feed_cache.bump(feed_cache.SITE, feed_cache.group_scope(instance.slug))
+
+
+def _shown_name(user):
+    return tuple(user.__dict__.get(name)
+                 for name in ("username", "first_name", "last_name"))
+
+
+@receiver(post_init, sender=User)
+def remember_shown_name(sender, instance, **kwargs):
+    instance._shown_name = _shown_name(instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    # Имя автора выводится в карточках его постов на любых страницах.
+    if not created and instance._shown_name != _shown_name(instance):
+        feed_cache.bump(feed_cache.SITE)
+    instance._shown_name = _shown_name(instance)
+
+
+@receiver(post_delete, sender=User)
+def drop_author_counter(sender, instance, **kwargs):
+    PostCount.objects.filter(
+        scope=PostCount.AUTHOR, object_id=instance.pk).delete()
+    feed_cache.bump(feed_cache.author_scope(instance.username))
+
+
+@receiver(post_migrate)
+def restore_fts_triggers(sender, using, **kwargs):
+    # Миграции, пересобирающие posts_post в SQLite, удаляют триггеры FTS.
+    if sender.label == "posts":
+        search.install_triggers(connections[using])
@@ -0,0 +1,220 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import NotSupportedError, connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..api import DEFAULT_FIELDS
+from ..models import User, Post, Group, PostCount, TimelineEntry
+from ..seeding import explicit_pub_date
+from .. import batch
+from .. import counters
+from .. import timeline
+from .utils import commit_callbacks
+
+
+class FeedApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(
+            username='ivanoff', first_name='Иван', last_name='Иванов')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        now = timezone.now()
+        with explicit_pub_date():
+            Post.objects.bulk_create(
+                Post(author=cls.author, group=cls.group if i % 2 else None,
+                     text=f'Пост {i}', pub_date=now - timedelta(minutes=i))
+                for i in range(25))
+        timeline.rebuild()
+        cls.posts = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_index_returns_default_fields(self):
+        """Главная лента отдает поля по умолчанию в порядке ленты"""
+        data = self.client.get(reverse('api_index')).json()
+        self.assertEqual(len(data['results']), 20)
+        first = data['results'][0]
+        self.assertEqual(tuple(first), DEFAULT_FIELDS)
+        self.assertEqual(first['id'], self.posts[0].pk)
+        self.assertEqual(first['author'], 'ivanoff')
+        self.assertEqual(
+            [row['id'] for row in data['results']],
+            [post.pk for post in self.posts[:20]])
+
+    def test_cursor_walks_the_whole_feed(self):
+        """Курсор next проходит ленту без пропусков и повторов"""
+        ids = []
+        url = reverse('api_index') + '?limit=7'
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(row['id'] for row in data['results'])
+            url = data['next'] and (
+                reverse('api_index') + f'?limit=7&after={data["next"]}')
+        self.assertEqual(ids, [post.pk for post in self.posts])
+
+    def test_sparse_fields_skip_joins(self):
+        """?fields= без автора и сообщества читает посты без JOIN"""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(
+                reverse('api_index') + '?fields=id,pub_date').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'pub_date'})
+        posts_sql = [query['sql'] for query in queries.captured_queries
+                     if '"posts_post"."pub_date"' in query['sql']]
+        self.assertEqual(len(posts_sql), 1)
+        self.assertNotIn('JOIN', posts_sql[0])
+        self.assertNotIn('"text"', posts_sql[0])
+
+    def test_unknown_field_and_bad_cursor_are_rejected(self):
+        """Неизвестное поле и битый курсор дают 400"""
+        for query in ('?fields=id,password', '?after=!!!', '?limit=x'):
+            with self.subTest(query=query):
+                response = self.client.get(reverse('api_index') + query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_group_and_profile_feeds(self):
+        """Ленты сообщества и автора отфильтрованы и несут число постов"""
+        group = self.client.get(reverse(
+            'api_group_posts', kwargs={'slug': 'test-slug'})).json()
+        self.assertEqual(group['count'], 12)
+        self.assertTrue(all(row['group'] == 'test-slug'
+                            for row in group['results']))
+        profile = self.client.get(reverse(
+            'api_profile', kwargs={'username': 'ivanoff'})).json()
+        self.assertEqual(profile['count'], 25)
+        missing = self.client.get(reverse(
+            'api_group_posts', kwargs={'slug': 'missing'}))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_single_post(self):
+        """Отдельный пост отдается с запрошенными полями или 404"""
+        post = self.posts[1]
+        url = reverse('api_post', kwargs={
+            'username': 'ivanoff', 'post_id': post.pk})
+        data = self.client.get(
+            url + '?fields=text,author_first_name,group_title').json()
+        self.assertEqual(data, {'text': post.text, 'author_first_name': 'Иван',
+                                'group_title': 'Группа'})
+        other = reverse('api_post', kwargs={
+            'username': 'petrov', 'post_id': post.pk})
+        self.assertEqual(self.client.get(other).status_code, 404)
+
+    def test_new_post_invalidates_cached_api(self):
+        """Новый пост сразу виден в закэшированном API"""
+        self.client.get(reverse('api_index'))
+        with commit_callbacks():
+            post = Post.objects.create(author=self.author, text='Свежий')
+        data = self.client.get(reverse('api_index')).json()
+        self.assertEqual(data['results'][0]['id'], post.pk)
+
+
+class BatchCreateApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='ivanoff')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        Post.objects.create(author=cls.author, text='Старый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def send(self, posts, client=None):
+        return (client or self.authorized_client).post(
+            reverse('api_create_posts'), json.dumps({'posts': posts}),
+            content_type='application/json')
+
+    def test_batch_creates_posts_in_order(self):
+        """Пачка создается целиком и возвращает id в порядке запроса"""
+        response = self.send([
+            {'text': 'Первый из пачки', 'group': self.group.pk},
+            {'text': 'Второй из пачки'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        ids = response.json()['ids']
+        self.assertEqual(
+            [Post.objects.get(pk=pk).text for pk in ids],
+            ['Первый из пачки', 'Второй из пачки'])
+        first = Post.objects.get(pk=ids[0])
+        self.assertEqual(first.author, self.author)
+        self.assertEqual(first.group, self.group)
+        self.assertEqual(first.text_html, 'Первый из пачки')
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('post_id', flat=True)),
+            set(Post.objects.values_list('pk', flat=True)))
+
+    def test_counters_and_cached_feeds_are_updated(self):
+        """Счетчики и закэшированные ленты видят новые посты"""
+        group_url = reverse('group_posts', kwargs={'slug': 'test-slug'})
+        self.guest_client.get(reverse('index'))
+        self.guest_client.get(group_url)
+        with commit_callbacks():
+            self.send([{'text': f'Пост {i}', 'group': self.group.pk}
+                       for i in range(3)])
+        self.assertEqual(counters.total_count(), 4)
+        self.assertEqual(counters.author_count(self.author), 4)
+        self.assertEqual(counters.group_count(self.group), 3)
+        self.assertEqual(
+            PostCount.objects.get(scope=PostCount.TOTAL).value, 4)
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            'Пост 2')
+        self.assertContains(self.guest_client.get(group_url), 'Пост 2')
+
+    def test_invalid_post_rejects_whole_batch(self):
+        """Ошибка в одном посте отклоняет всю пачку с указанием номера"""
+        response = self.send([{'text': 'Нормальный'}, {'text': ''},
+                              {'text': 'С чужой группой', 'group': 999}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [error['index'] for error in response.json()['errors']], [1, 2])
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_queries_do_not_grow_with_batch(self):
+        """Запись пачки не делает запросов на каждый пост"""
+        counts = []
+        for size in (2, 20):
+            with CaptureQueriesContext(connection) as queries:
+                self.send([{'text': f'Пост {i}'} for i in range(size)])
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_id_readback_is_sqlite_only(self):
+        """Без id из bulk_create пачку пишет только SQLite"""
+        with mock.patch.object(connection, 'vendor', 'mysql'), \
+                self.assertRaises(NotSupportedError):
+            batch.create_posts(self.author, [Post(text='Пост')])
+        self.assertEqual(Post.objects.count(), 1)
+
+    @override_settings(POST_BATCH_LIMIT=2)
+    def test_bad_requests(self):
+        """Аноним, GET, лишние посты и не JSON отклоняются"""
+        self.assertEqual(self.send([{'text': 'Пост'}],
+                                   self.guest_client).status_code, 401)
+        self.assertEqual(self.authorized_client.get(
+            reverse('api_create_posts')).status_code, 405)
+        self.assertEqual(self.send([{'text': 'Пост'}] * 3).status_code, 400)
+        self.assertEqual(self.send([]).status_code, 400)
+        response = self.authorized_client.post(
+            reverse('api_create_posts'), 'posts',
+            content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_csrf_is_required(self):
+        """Запрос без CSRF-токена из сессии отклоняется"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.author)
+        self.assertEqual(self.send([{'text': 'Пост'}], client).status_code,
+                         403)
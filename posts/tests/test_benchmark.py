@@ -0,0 +1,81 @@
+import json
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..benchmark import percentile, summarize
+from ..models import User, Post, Group
+
+
+class BenchmarkTests(TestCase):
+    def test_percentile_nearest_rank(self):
+        """Перцентиль считается методом ближайшего ранга"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summarize_counts_errors_and_queries(self):
+        """Сводка прогона учитывает ошибки и запросы к БД"""
+        summary = summarize([(0.01, 2, True), (0.03, 4, False)], wall=0.5)
+        self.assertEqual(summary['requests'], 2)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['requests_per_second'], 4.0)
+        self.assertEqual(summary['queries_per_request'], 3.0)
+
+    def test_bench_urls_reports_every_page(self):
+        """bench_urls отдает JSON по всем страницам posts.urls"""
+        group = Group.objects.create(title='Группа', slug='test-slug')
+        author = User.objects.create(username='ivanoff')
+        Post.objects.create(author=author, group=group, text='Пост')
+        stdout = StringIO()
+        call_command('bench_urls', posts=0, requests=2, concurrency='1',
+                     stdout=stdout, stderr=StringIO())
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(
+            {result['url'] for result in report['results']},
+            {'index', 'group_list', 'group_posts', 'profile', 'post',
+             'new_post', 'post_edit'},
+        )
+        for result in report['results']:
+            with self.subTest(url=result['url']):
+                self.assertEqual(result['errors'], 0)
+                self.assertEqual(result['requests'], 2)
+
+    def test_bench_api_compares_api_with_html(self):
+        """bench_api сравнивает JSON API и HTML по каждой ленте"""
+        group = Group.objects.create(title='Группа', slug='test-slug')
+        author = User.objects.create(username='ivanoff')
+        Post.objects.create(author=author, group=group, text='Пост')
+        stdout = StringIO()
+        call_command('bench_api', posts=0, requests=2,
+                     stdout=stdout, stderr=StringIO())
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(
+            {(result['page'], result['variant'])
+             for result in report['results']},
+            {(page, variant)
+             for page in ('index', 'group_posts', 'profile', 'post')
+             for variant in ('html', 'api', 'api_fields')},
+        )
+        for result in report['results']:
+            with self.subTest(page=result['page'], variant=result['variant']):
+                self.assertEqual(result['errors'], 0)
+                self.assertGreater(result['bytes'], 0)
+
+    def test_bench_api_without_groups(self):
+        """bench_api работает без сообществ и сообщает о пустой базе"""
+        with self.assertRaises(CommandError):
+            call_command('bench_api', posts=0, requests=1,
+                         stdout=StringIO(), stderr=StringIO())
+        author = User.objects.create(username='ivanoff')
+        for i in range(2):
+            Post.objects.create(author=author, text=f'Пост {i}')
+        stdout = StringIO()
+        call_command('bench_api', posts=0, requests=1,
+                     stdout=stdout, stderr=StringIO())
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(
+            {result['page'] for result in report['results']},
+            {'index', 'profile', 'post'})
@@ -0,0 +1,213 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..cache import INDEX, check_shared_cache, get_versions
+from ..models import User, Post, Group
+from .utils import commit_callbacks
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='ivanoff')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_anonymous_feed_is_served_from_cache(self):
+        """Повторный запрос ленты анонимом не ходит в базу"""
+        for url in (reverse('index'),
+                    reverse('group_posts', kwargs={'slug': 'test-slug'})):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    second = self.guest_client.get(url)
+                self.assertEqual(len(queries), 0)
+                self.assertEqual(first.content, second.content)
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден в закэшированных лентах"""
+        group_url = reverse('group_posts', kwargs={'slug': 'test-slug'})
+        self.guest_client.get(reverse('index'))
+        self.guest_client.get(group_url)
+        with commit_callbacks():
+            self.authorized_client.post(
+                reverse('new_post'),
+                data={'text': 'Свежий пост', 'group': self.group.id})
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            'Свежий пост')
+        self.assertContains(self.guest_client.get(group_url), 'Свежий пост')
+
+    def test_edit_moving_post_invalidates_old_group(self):
+        """Перенос поста в другую группу сбрасывает кэш старой группы"""
+        group_url = reverse('group_posts', kwargs={'slug': 'test-slug'})
+        self.assertContains(self.guest_client.get(group_url), 'Первый пост')
+        with commit_callbacks():
+            self.authorized_client.post(
+                reverse('post_edit', kwargs={
+                    'username': 'ivanoff', 'post_id': self.post.id}),
+                data={'text': 'Первый пост'})
+        self.assertNotContains(self.guest_client.get(group_url),
+                               'Первый пост')
+
+    def test_group_edit_invalidates_group_page(self):
+        """Правка описания группы видна на закэшированной странице"""
+        group_url = reverse('group_posts', kwargs={'slug': 'test-slug'})
+        self.guest_client.get(group_url)
+        self.group.description = 'Новое описание'
+        with commit_callbacks():
+            self.group.save()
+        self.assertContains(self.guest_client.get(group_url),
+                            'Новое описание')
+
+    def test_admin_edit_refreshes_cached_post_card(self):
+        """Правка в админке видна на странице поста с кэшем карточки"""
+        url = reverse('post', kwargs={'username': 'ivanoff',
+                                      'post_id': self.post.pk})
+        self.guest_client.get(url)
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.guest_client.force_login(admin)
+        self.guest_client.post(
+            reverse('admin:posts_post_change', args=[self.post.pk]),
+            {'text': 'Правка из админки', 'author': self.author.pk,
+             'group': self.group.pk})
+        self.guest_client.logout()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, 2)
+        self.assertContains(self.guest_client.get(url), 'Правка из админки')
+
+    def test_versions_move_after_commit(self):
+        """Версии лент сдвигаются только после коммита правки"""
+        before = get_versions([INDEX])
+        with commit_callbacks():
+            Post.objects.create(author=self.author, text='Черновик')
+            self.assertEqual(get_versions([INDEX]), before)
+        self.assertNotEqual(get_versions([INDEX]), before)
+
+    def test_authorized_feed_is_not_cached(self):
+        """Страницы для авторизованных не берутся из кэша"""
+        self.authorized_client.get(reverse('index'))
+        response = self.authorized_client.get(reverse('index'))
+        self.assertIsNotNone(response.context)
+
+    @override_settings(FEED_CACHE_TIMEOUT=0)
+    def test_zero_timeout_disables_cache(self):
+        """FEED_CACHE_TIMEOUT = 0 отключает кэш страниц"""
+        self.guest_client.get(reverse('index'))
+        response = self.guest_client.get(reverse('index'))
+        self.assertIsNotNone(response.context)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='ivanoff')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+        self.urls = (
+            reverse('index'),
+            reverse('group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('profile', kwargs={'username': 'ivanoff'}),
+            reverse('post', kwargs={'username': 'ivanoff',
+                                    'post_id': self.post.pk}),
+        )
+
+    def test_unchanged_pages_answer_304_without_queries(self):
+        """Неизменная страница отдает 304 без запросов к базе"""
+        for client in (self.guest_client, self.authorized_client):
+            for url in self.urls:
+                with self.subTest(url=url):
+                    first = client.get(url)
+                    self.assertEqual(first.status_code, 200)
+                    self.assertIn('Cookie', first['Vary'])
+                    with CaptureQueriesContext(connection) as queries:
+                        response = client.get(
+                            url, HTTP_IF_NONE_MATCH=first['ETag'])
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(len(queries), 0)
+
+    def test_validators_depend_on_session(self):
+        """ETag гостя не подходит авторизованному посетителю"""
+        url = reverse('index')
+        etag = self.guest_client.get(url)['ETag']
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_no_last_modified(self):
+        """Страницы не отдают Last-Modified: он не учитывает сессию"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotIn('Last-Modified', self.guest_client.get(url))
+                response = self.authorized_client.get(
+                    url,
+                    HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+                self.assertEqual(response.status_code, 200)
+
+    def test_changes_refresh_validators(self):
+        """Новый пост, смена имени автора и сообщества меняют ETag"""
+        def rename_author():
+            self.author.first_name = 'Иван'
+            self.author.save()
+
+        changes = (
+            lambda: Post.objects.create(
+                author=self.author, group=self.group, text='Новый'),
+            rename_author,
+            lambda: self.group.save(),
+        )
+        for change in changes:
+            etags = {url: self.guest_client.get(url)['ETag']
+                     for url in self.urls}
+            with commit_callbacks():
+                change()
+            for url in self.urls:
+                with self.subTest(url=url):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etags[url])
+                    self.assertEqual(response.status_code, 200)
+
+    def test_other_authors_post_keeps_profile_valid(self):
+        """Пост другого автора не сбрасывает страницы этого автора"""
+        url = self.urls[2]
+        etag = self.guest_client.get(url)['ETag']
+        with commit_callbacks():
+            Post.objects.create(
+                author=User.objects.create(username='petroff'),
+                text='Чужой')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_process_cache_is_reported(self):
+        """Кэш в памяти процесса дает предупреждение при --deploy"""
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)],
+            ['posts.W001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/yatube-test-cache',
+    }})
+    def test_shared_cache_passes(self):
+        """Общий для процессов кэш проходит проверку"""
+        self.assertEqual(check_shared_cache(None), [])
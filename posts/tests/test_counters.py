@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..counters import author_count, group_count, total_count
+from ..models import User, Post, Group, PostCount
+
+
+class PostCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='ivanoff')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+
+    def test_counters_follow_create_edit_and_delete(self):
+        """Счетчики меняются при создании, смене группы и удалении"""
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост')
+        Post.objects.create(author=self.author, text='Пост без группы')
+        self.assertEqual(total_count(), 2)
+        self.assertEqual(author_count(self.author), 2)
+        self.assertEqual(group_count(self.group), 1)
+
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(group_count(self.group), 0)
+        self.assertEqual(group_count(self.other_group), 1)
+
+        post.delete()
+        self.assertEqual(total_count(), 1)
+        self.assertEqual(author_count(self.author), 1)
+        self.assertEqual(group_count(self.other_group), 0)
+
+    def test_recount_posts_repairs_drift(self):
+        """Команда recount_posts исправляет разошедшиеся счетчики"""
+        Post.objects.create(author=self.author, group=self.group, text='Пост')
+        PostCount.objects.update(value=100)
+        call_command('recount_posts', stdout=StringIO())
+        self.assertEqual(total_count(), 1)
+        self.assertEqual(author_count(self.author), 1)
+        self.assertEqual(group_count(self.group), 1)
+
+    def test_feeds_do_not_count_rows(self):
+        """Страницы ленты не выполняют COUNT по постам"""
+        Post.objects.create(author=self.author, group=self.group, text='Пост')
+        urls = (
+            reverse('index'),
+            reverse('group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('profile', kwargs={'username': 'ivanoff'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = Client().get(url)
+                self.assertEqual(response.context['paginator'].count, 1)
+                for query in queries:
+                    self.assertNotIn('COUNT(', query['sql'])
@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import User, Post, Group
+
+
+class ExportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='ivanoff')
+        cls.other = User.objects.create(username='petroff')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.old = Post.objects.create(
+            author=cls.author, group=cls.group, text='Старый, "с кавычками"')
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        cls.new = Post.objects.create(
+            author=cls.author, text='Новый\nв две строки')
+        cls.foreign = Post.objects.create(author=cls.other, text='Чужой')
+
+    def export(self, **options):
+        output = io.StringIO()
+        call_command('export_posts', stdout=output, **options)
+        return output.getvalue()
+
+    def test_jsonl_has_author_and_group(self):
+        """JSON Lines: строка на пост с username автора и slug сообщества"""
+        rows = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual([row['id'] for row in rows],
+                         [self.old.pk, self.new.pk, self.foreign.pk])
+        self.assertEqual(rows[0]['author'], 'ivanoff')
+        self.assertEqual(rows[0]['group'], 'test-slug')
+        self.assertIsNone(rows[1]['group'])
+        self.assertEqual(rows[1]['text'], 'Новый\nв две строки')
+
+    def test_csv_round_trips_text(self):
+        """CSV с заголовком читается обратно без искажения текста"""
+        rows = list(csv.DictReader(io.StringIO(self.export(format='csv'))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['text'], 'Старый, "с кавычками"')
+        self.assertEqual(rows[1]['text'], 'Новый\nв две строки')
+
+    def test_output_file_is_utf8_on_any_locale(self):
+        """Файл выгрузки пишется в UTF-8 и при локали не в UTF-8"""
+        def ascii_locale_open(*args, **kwargs):
+            kwargs.setdefault('encoding', 'ascii')
+            return open(*args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.jsonl')
+            with mock.patch(
+                    'posts.management.commands.export_posts.open',
+                    ascii_locale_open, create=True):
+                call_command('export_posts', output=path)
+            with open(path, encoding='utf-8') as exported:
+                rows = [json.loads(line) for line in exported]
+        self.assertEqual(rows[2]['text'], 'Чужой')
+
+    def test_filters(self):
+        """Фильтры по сообществу, автору и датам"""
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        cases = (
+            ({'group': 'test-slug'}, [self.old.pk]),
+            ({'author': 'petroff'}, [self.foreign.pk]),
+            ({'since': since, 'author': 'ivanoff'}, [self.new.pk]),
+            ({'until': since}, [self.old.pk]),
+        )
+        for options, expected in cases:
+            with self.subTest(options=options):
+                ids = [json.loads(line)['id']
+                       for line in self.export(**options).splitlines()]
+                self.assertEqual(ids, expected)
+
+    def test_bad_date_is_rejected(self):
+        """Неверная дата — ошибка команды"""
+        with self.assertRaises(CommandError):
+            self.export(since='вчера')
+
+    def test_admin_endpoint_streams_for_staff_only(self):
+        """Выгрузка в админке потоковая и доступна только персоналу"""
+        url = reverse('admin:posts_post_export')
+        client = Client()
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'))
+        response = client.get(url, {'format': 'csv', 'author': 'petroff'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.splitlines()[1].split(',')[0],
+                         str(self.foreign.pk))
+        for params in ({'format': 'xml'}, {'since': 'вчера'}):
+            with self.subTest(params=params):
+                self.assertEqual(client.get(url, params).status_code, 400)
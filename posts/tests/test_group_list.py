@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import counters
+from ..models import User, Post, Group
+from ..views import GROUPS_PER_PAGE
+from .utils import commit_callbacks
+
+
+class GroupListTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='ivanoff')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.empty = Group.objects.create(title='Пустая', slug='empty')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_groups_have_counts_and_latest_post(self):
+        """В каталоге число постов и дата последнего поста сообщества"""
+        Post.objects.create(author=self.author, group=self.group, text='2')
+        response = self.guest_client.get(reverse('group_list'))
+        groups = {group.slug: group for group in response.context['page']}
+        self.assertEqual(groups['test-slug'].posts_count, 2)
+        self.assertEqual(
+            groups['test-slug'].last_pub_date,
+            Post.objects.filter(group=self.group).latest('pub_date').pub_date)
+        self.assertEqual(groups['empty'].posts_count, 0)
+        self.assertIsNone(groups['empty'].last_pub_date)
+
+    def test_missing_counter_is_recounted(self):
+        """Сообщество без счетчика получает число постов подсчетом"""
+        counters.PostCount.objects.all().delete()
+        response = self.guest_client.get(reverse('group_list'))
+        groups = {group.slug: group for group in response.context['page']}
+        self.assertEqual(groups['test-slug'].posts_count, 1)
+
+    def test_queries_do_not_grow_with_groups(self):
+        """Каталог строится запросом страницы и подсчетом сообществ"""
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group-{i}') for i in range(30))
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(reverse('group_list'))
+        posts_queries = [query for query in queries.captured_queries
+                         if 'posts_' in query['sql']]
+        self.assertEqual(len(posts_queries), 2)
+
+    def test_count_skips_stats_subqueries(self):
+        """Число сообществ считается без подзапросов статистики"""
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('group_list'))
+        counts = [query['sql'] for query in queries.captured_queries
+                  if 'COUNT(*)' in query['sql']
+                  and 'posts_group' in query['sql']]
+        self.assertEqual(len(counts), 1)
+        self.assertNotIn('posts_postcount', counts[0])
+        self.assertNotIn('posts_timelineentry', counts[0])
+
+    def test_pagination(self):
+        """Каталог делится на страницы по GROUPS_PER_PAGE сообществ"""
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(GROUPS_PER_PAGE))
+        first = self.guest_client.get(reverse('group_list'))
+        second = self.guest_client.get(reverse('group_list') + '?page=2')
+        self.assertEqual(len(first.context['page']), GROUPS_PER_PAGE)
+        self.assertEqual(len(second.context['page']), 2)
+
+    def test_anonymous_directory_is_cached(self):
+        """Повторный запрос каталога анонимом не ходит в базу"""
+        first = self.guest_client.get(reverse('group_list'))
+        with CaptureQueriesContext(connection) as queries:
+            second = self.guest_client.get(reverse('group_list'))
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(first.content, second.content)
+
+    def test_post_in_group_invalidates_directory(self):
+        """Новый и удаленный пост сообщества меняют закэшированный каталог"""
+        url = reverse('group_list')
+        self.assertContains(self.guest_client.get(url), 'Записей: 1')
+        with commit_callbacks():
+            post = Post.objects.create(
+                author=self.author, group=self.group, text='Второй',
+            )
+        self.assertContains(self.guest_client.get(url), 'Записей: 2')
+        with commit_callbacks():
+            post.delete()
+        self.assertContains(self.guest_client.get(url), 'Записей: 1')
+
+    def test_post_without_group_keeps_directory_cached(self):
+        """Пост без сообщества не сбрасывает кэш каталога"""
+        self.guest_client.get(reverse('group_list'))
+        with commit_callbacks():
+            Post.objects.create(author=self.author, text='Без группы')
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('group_list'))
+        self.assertEqual(len(queries), 0)
+
+    def test_moving_post_updates_latest_date(self):
+        """Перенос поста между сообществами меняет их даты в каталоге"""
+        self.post.group = self.empty
+        self.post.save()
+        response = self.guest_client.get(reverse('group_list'))
+        groups = {group.slug: group for group in response.context['page']}
+        self.assertIsNone(groups['test-slug'].last_pub_date)
+        self.assertEqual(groups['empty'].posts_count, 1)
+        self.assertAlmostEqual(
+            groups['empty'].last_pub_date, self.post.pub_date,
+            delta=timedelta(seconds=1))
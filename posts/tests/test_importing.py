@@ -0,0 +1,106 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..counters import author_count, group_count, total_count
+from ..importing import Importer
+from ..models import User, Post, Group, TimelineEntry
+
+
+class ImportPostsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='ivanoff')
+        self.group = Group.objects.create(title='Группа', slug='test-slug')
+
+    def lines(self, *rows):
+        return [row if isinstance(row, str) else json.dumps(row)
+                for row in rows]
+
+    def test_valid_rows_are_imported_everywhere(self):
+        """Посты попадают в базу, счетчики, ленту и на главную"""
+        importer = Importer(batch_size=2)
+        importer.run(self.lines(
+            {'author': 'ivanoff', 'group': 'test-slug', 'text': 'Первый\nпост',
+             'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'author': 'ivanoff', 'text': 'Второй пост'},
+            {'author': 'ivanoff', 'group': None, 'text': 'Третий пост'},
+        ))
+        self.assertEqual(importer.imported, 3)
+        self.assertEqual(importer.rejected, [])
+        first = Post.objects.get(text='Первый\nпост')
+        self.assertEqual(first.pub_date.year, 2020)
+        self.assertEqual(first.text_html, 'Первый<br>пост')
+        self.assertEqual(total_count(), 3)
+        self.assertEqual(author_count(self.author), 3)
+        self.assertEqual(group_count(self.group), 1)
+        self.assertEqual(TimelineEntry.objects.count(), 3)
+        self.assertContains(self.client.get(reverse('index')), 'Второй пост')
+
+    def test_import_keeps_existing_timeline_and_counters(self):
+        """Загрузка дописывает ленту и счетчики, не перестраивая их"""
+        old = Post.objects.create(author=self.author, text='Старый пост')
+        entry = TimelineEntry.objects.get(post=old)
+        rows = [{'author': 'ivanoff', 'group': 'test-slug', 'text': f'П {i}'}
+                for i in range(5)]
+        with mock.patch('posts.timeline.rebuild') as rebuild, \
+                mock.patch('posts.counters.recount_all') as recount_all:
+            Importer(batch_size=2).run(self.lines(*rows))
+        rebuild.assert_not_called()
+        recount_all.assert_not_called()
+        self.assertEqual(TimelineEntry.objects.get(post=old), entry)
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('post_id', flat=True)),
+            set(Post.objects.values_list('pk', flat=True)))
+        self.assertEqual(total_count(), 6)
+        self.assertEqual(author_count(self.author), 6)
+        self.assertEqual(group_count(self.group), 5)
+
+    def test_invalid_rows_are_rejected_with_line_numbers(self):
+        """Неверные строки отклоняются, остальные загружаются"""
+        importer = Importer()
+        importer.run(self.lines(
+            {'author': 'ivanoff', 'text': 'Хороший пост'},
+            {'author': 'nobody', 'text': 'Нет автора'},
+            {'author': 'ivanoff', 'group': 'missing', 'text': 'Нет группы'},
+            {'author': 'ivanoff', 'text': '   '},
+            'не JSON',
+            {'author': 'ivanoff', 'text': 'Дата', 'pub_date': 'вчера'},
+            '',
+        ))
+        self.assertEqual(importer.imported, 1)
+        self.assertEqual(sorted(number for number, _ in importer.rejected),
+                         [2, 3, 4, 5, 6])
+
+    def test_lookups_are_cached(self):
+        """Авторы и сообщества ищутся запросом на пачку, а не на строку"""
+        rows = [{'author': 'ivanoff', 'group': 'test-slug', 'text': f'П {i}'}
+                for i in range(50)]
+        with CaptureQueriesContext(connection) as queries:
+            Importer(batch_size=100).run(self.lines(*rows))
+        lookups = [query['sql'] for query in queries
+                   if 'FROM "auth_user"' in query['sql']
+                   or 'FROM "posts_group"' in query['sql']]
+        self.assertEqual(len(lookups), 2)
+
+    def test_command_round_trips_export(self):
+        """import_posts читает выгрузку export_posts"""
+        Post.objects.create(author=self.author, group=self.group, text='A')
+        Post.objects.create(author=self.author, text='B')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.jsonl')
+            call_command('export_posts', output=path)
+            output = io.StringIO()
+            call_command('import_posts', path, stdout=output)
+        self.assertIn('Загружено постов: 2', output.getvalue())
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 2)
+        self.assertEqual(total_count(), 4)
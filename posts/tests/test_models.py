@@ -1,3 +1,6 @@
+from unittest import mock
+
+from django.db.models.signals import post_save
 from django.test import TestCase
 
 from ..models import Post, Group, User
@@ -51,6 +54,80 @@ class PostModelTest(TestCase):
         self.assertEqual(
             str(post), expected_str_post)
 
+    def test_text_html_follows_text(self):
+        """text_html пересобирается из текста при его правке"""
+        post = Post.objects.create(
+            author=PostModelTest.post.author, text='<b>строка</b>\nвторая')
+        self.assertEqual(
+            post.text_html, '&lt;b&gt;строка&lt;/b&gt;<br>вторая')
+        post.text = 'новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'новый текст')
+        post.text = 'только текст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'только текст')
+        deferred = Post.objects.only('text').get(pk=post.pk)
+        deferred.text = 'из отложенного'
+        deferred.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'из отложенного')
+
+    def test_unchanged_text_is_not_rendered_again(self):
+        """Сохранение без правки текста не пересобирает text_html"""
+        post = Post.objects.create(
+            author=PostModelTest.post.author, text='Пост')
+        post = Post.objects.get(pk=post.pk)
+        with mock.patch('posts.models.render_text') as render:
+            post.save()
+        render.assert_not_called()
+
+    def test_version_and_updated_at_follow_saves(self):
+        """Каждое сохранение поднимает версию и дату изменения"""
+        post = Post.objects.create(
+            author=PostModelTest.post.author, text='Пост')
+        self.assertEqual(post.version, 1)
+        created_at = post.updated_at
+        post.text = 'Правка'
+        post.save()
+        self.assertEqual(post.version, 2)
+        self.assertGreater(post.updated_at, created_at)
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.version, 3)
+
+    def test_concurrent_saves_get_distinct_versions(self):
+        """Две копии одного поста не получают одинаковую версию"""
+        post = Post.objects.create(
+            author=PostModelTest.post.author, text='Пост')
+        first = Post.objects.get(pk=post.pk)
+        second = Post.objects.get(pk=post.pk)
+        first.save()
+        second.save()
+        self.assertEqual((first.version, second.version), (2, 3))
+
+    def test_signals_see_saved_version(self):
+        """Обработчики post_save видят число версии, а не выражение"""
+        post = Post.objects.create(
+            author=PostModelTest.post.author, text='Пост')
+        seen = []
+
+        def receiver(sender, instance, **kwargs):
+            seen.append(instance.version)
+
+        post_save.connect(receiver, sender=Post)
+        try:
+            post.save()
+            deferred = Post.objects.only('text').get(pk=post.pk)
+            deferred.text = 'Правка'
+            deferred.save()
+        finally:
+            post_save.disconnect(receiver, sender=Post)
+        self.assertEqual(seen, [2, 3])
+        post.refresh_from_db()
+        self.assertEqual(post.version, 3)
+
 
 class GroupModelTest(TestCase):
     @classmethod
@@ -1,7 +1,11 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import User, Post, Group
+from ..models import User, Post, Group, PostCount
+from ..paginator import page_window
 
 
 class PaginatorViewsTest(TestCase):
@@ -28,6 +32,7 @@ class PaginatorViewsTest(TestCase):
 
     def setUp(self):
         self.guest_client = Client()
+        cache.clear()
 
     def test_first_page_containse_ten_records(self):
         """На первой странице index должно быть 10 постов"""
@@ -53,3 +58,80 @@ class PaginatorViewsTest(TestCase):
             reverse('group_posts', kwargs={'slug': 'test-slug'}) + '?page=2'
         )
         self.assertEqual(len(response.context['page'].object_list), 3)
+
+    def test_after_cursor_matches_second_page(self):
+        """Курсор «Следующая» открывает те же посты, что и ?page=2"""
+        first = self.client.get(reverse('index'))
+        cursor = first.context['page'].next_cursor
+        by_cursor = self.client.get(reverse('index') + f'?after={cursor}')
+        by_number = self.client.get(reverse('index') + '?page=2')
+        self.assertEqual(
+            [post.pk for post in by_cursor.context['page']],
+            [post.pk for post in by_number.context['page']],
+        )
+        self.assertEqual(by_cursor.context['page'].number, 2)
+
+    def test_before_cursor_returns_previous_page(self):
+        """Курсор «Предыдущая» возвращает на первую страницу"""
+        first = self.client.get(reverse('index'))
+        second = self.client.get(
+            reverse('index') + f'?after={first.context["page"].next_cursor}'
+        )
+        back = self.client.get(
+            reverse('index')
+            + f'?before={second.context["page"].previous_cursor}'
+        )
+        self.assertEqual(
+            [post.pk for post in back.context['page']],
+            [post.pk for post in first.context['page']],
+        )
+        self.assertIsNone(back.context['page'].previous_cursor)
+
+    def test_cursor_page_does_not_use_offset(self):
+        """Страница по курсору выбирается без OFFSET"""
+        first = self.client.get(reverse('index') + '?page=2')
+        cursor = first.context['page'].next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('index') + f'?after={cursor}')
+        self.assertEqual(len(response.context['page'].object_list), 6)
+        for query in queries:
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Битый курсор не ломает страницу, а открывает первую"""
+        response = self.client.get(reverse('index') + '?after=broken')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page'].number, 1)
+
+
+class PageWindowTest(TestCase):
+    def test_window_keeps_edges_and_neighbours(self):
+        """Окно: края, текущая ±2 и пропуски на месте остальных"""
+        cases = {
+            (1, 1): [1],
+            (3, 7): [1, 2, 3, 4, 5, 6, 7],
+            (1, 50000): [1, 2, 3, None, 50000],
+            (25000, 50000): [1, None, 24998, 24999, 25000, 25001, 25002,
+                             None, 50000],
+            (50000, 50000): [1, None, 49998, 49999, 50000],
+        }
+        for (number, num_pages), expected in cases.items():
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), expected)
+
+    def test_response_size_does_not_grow_with_post_count(self):
+        """Размер страницы ленты не растет вместе с числом постов"""
+        author = User.objects.create(username='ivanoff')
+        for i in range(12):
+            Post.objects.create(author=author, text=f'Пост {i}')
+        # Счетчик задает число страниц, не создавая сотни тысяч постов.
+        sizes = []
+        for total in (12, 5000, 500000):
+            PostCount.objects.filter(scope=PostCount.TOTAL).update(
+                value=total)
+            cache.clear()
+            response = self.client.get(reverse('index'), {'page': 2})
+            self.assertLessEqual(
+                response.content.count(b'class="page-item'), 10)
+            sizes.append(len(response.content))
+        self.assertLess(max(sizes) - min(sizes), 500)
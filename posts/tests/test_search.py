@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from django.test import RequestFactory, TestCase, Client
+from django.urls import reverse
+
+from ..models import User, Post
+from ..search import FTS_TABLE, fts_enabled, search_posts
+
+
+class SearchViewTests(TestCase):
+    def setUp(self):
+        author = User.objects.create(username='ivanoff')
+        self.beer = Post.objects.create(
+            author=author, text='Пиво и снова пиво, много Пива')
+        self.wine = Post.objects.create(author=author, text='Только вино')
+        self.both = Post.objects.create(
+            author=author, text='Пиво лучше, чем вино')
+        self.guest_client = Client()
+
+    def search(self, query):
+        response = self.guest_client.get(reverse('search'), {'q': query})
+        return [post.pk for post in response.context['page']]
+
+    def test_index_is_installed(self):
+        """Миграции создали индекс FTS5"""
+        self.assertTrue(fts_enabled())
+
+    def test_migrate_restores_triggers(self):
+        """migrate возвращает триггеры, удаленные пересборкой posts_post"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {FTS_TABLE}_ai")
+            emit_post_migrate_signal(0, False, connection.alias)
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'posts_post'")
+            triggers = {row[0] for row in cursor.fetchall()}
+        self.assertEqual(triggers, {
+            f"{FTS_TABLE}_{suffix}" for suffix in ("ai", "ad", "au")})
+        post = Post.objects.create(author=self.beer.author, text='Про квас')
+        self.assertEqual(self.search('квас'), [post.pk])
+
+    def test_index_and_posts_come_from_one_database(self):
+        """Индекс и посты читаются из базы, выбранной роутером для чтения"""
+        with mock.patch('posts.search.router.db_for_read',
+                        return_value='default') as db_for_read:
+            results = search_posts('пиво')
+            found = [post.pk for post in results[0:2]]
+        db_for_read.assert_called_once_with(Post)
+        self.assertEqual(results.using, 'default')
+        self.assertEqual(found, [self.beer.pk, self.both.pk])
+
+    def test_search_finds_ranked_posts(self):
+        """Поиск находит посты и ставит самый релевантный первым"""
+        self.assertEqual(self.search('пиво'), [self.beer.pk, self.both.pk])
+        self.assertEqual(self.search('пиво вино'), [self.both.pk])
+
+    def test_index_follows_edit_and_delete(self):
+        """Правка и удаление поста сразу видны в поиске"""
+        self.wine.text = 'Теперь про квас'
+        self.wine.save()
+        self.assertEqual(self.search('квас'), [self.wine.pk])
+        self.assertEqual(self.search('вино'), [self.both.pk])
+        self.both.delete()
+        self.assertEqual(self.search('вино'), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Кавычки и операторы FTS5 в запросе не ломают страницу"""
+        for query in ('"пиво', 'NOT', 'пиво OR', '*'):
+            with self.subTest(query=query):
+                response = self.guest_client.get(
+                    reverse('search'), {'q': query})
+                self.assertEqual(response.status_code, 200)
+
+    def test_empty_query_shows_form(self):
+        """Без запроса страница поиска пуста"""
+        response = self.guest_client.get(reverse('search'))
+        self.assertEqual(len(response.context['page'].object_list), 0)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты через FTS5"""
+        admin_model = site._registry[Post]
+        request = RequestFactory().get('/')
+        queryset, distinct = admin_model.get_search_results(
+            request, Post.objects.all(), 'вино')
+        self.assertEqual(
+            set(queryset.values_list('pk', flat=True)),
+            {self.wine.pk, self.both.pk},
+        )
+        self.assertIn('posts_post_fts', str(queryset.query))
@@ -0,0 +1,50 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..counters import author_count, total_count
+from ..models import User, Post, Group, TimelineEntry
+
+
+class SeedYatubeTests(TestCase):
+    def seed(self, **options):
+        call_command('seed_yatube', stdout=StringIO(), **options)
+
+    def test_seed_creates_requested_rows(self):
+        """seed_yatube создает заданное число строк и обновляет счетчики"""
+        self.seed(users=20, groups=3, posts=300, batch_size=64)
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(total_count(), 300)
+        self.assertEqual(TimelineEntry.objects.count(), 300)
+        self.assertGreater(
+            Post.objects.values('pub_date').distinct().count(), 290)
+
+    def test_seed_tops_up_per_batch(self):
+        """Досоздание постов пишет ленту и счетчики пачками, без пересчета"""
+        self.seed(users=5, groups=2, posts=100, batch_size=32)
+        with mock.patch('posts.timeline.rebuild') as rebuild, \
+                mock.patch('posts.counters.recount_all') as recount_all:
+            self.seed(users=0, groups=0, posts=70, batch_size=32)
+        rebuild.assert_not_called()
+        recount_all.assert_not_called()
+        self.assertEqual(total_count(), 170)
+        self.assertEqual(TimelineEntry.objects.count(), 170)
+        for author in User.objects.all():
+            self.assertEqual(author_count(author), author.posts.count())
+
+    def test_seed_is_reproducible(self):
+        """Одинаковое зерно дает одинаковые тексты и распределение"""
+        self.seed(users=10, groups=2, posts=50, seed=7)
+        first = list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username', 'group__slug'))
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed(users=10, groups=2, posts=50, seed=7)
+        second = list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username', 'group__slug'))
+        self.assertEqual(first, second)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import User, Post, Group, TimelineEntry
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='ivanoff')
+        self.group = Group.objects.create(title='Группа', slug='test-slug')
+        self.other_group = Group.objects.create(title='Другая', slug='other')
+
+    def entry(self, post):
+        return TimelineEntry.objects.filter(post=post).values(
+            'pub_date', 'author_id', 'group_id').first()
+
+    def test_entries_follow_create_edit_and_delete(self):
+        """Запись ленты повторяет пост при создании, правке и удалении"""
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост')
+        self.assertEqual(self.entry(post), {
+            'pub_date': post.pub_date, 'author_id': self.author.pk,
+            'group_id': self.group.pk})
+
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.entry(post)['group_id'], self.other_group.pk)
+
+        self.other_group.delete()
+        self.assertIsNone(self.entry(post)['group_id'])
+
+        post.delete()
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_saving_deferred_post_keeps_entry(self):
+        """Сохранение поста без загруженных ключей ленты не дублирует запись"""
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост')
+        deferred = Post.objects.only('text').get(pk=post.pk)
+        deferred.text = 'Правка'
+        deferred.save()
+        self.assertEqual(TimelineEntry.objects.filter(post=post).count(), 1)
+        self.assertEqual(self.entry(post)['group_id'], self.group.pk)
+
+        TimelineEntry.objects.all().delete()
+        deferred.save()
+        self.assertEqual(self.entry(post), {
+            'pub_date': post.pub_date, 'author_id': self.author.pk,
+            'group_id': self.group.pk})
+
+    def test_rebuild_timeline_restores_entries(self):
+        """rebuild_timeline строит ленту заново по постам"""
+        posts = [Post.objects.create(author=self.author, text=f'Пост {i}')
+                 for i in range(3)]
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(
+            sorted(TimelineEntry.objects.values_list('post_id', flat=True)),
+            [post.pk for post in posts])
+
+    def test_feeds_read_posts_in_timeline_order(self):
+        """Ленты выводят посты в порядке ленты на всех страницах"""
+        posts = [Post.objects.create(
+            author=self.author, group=self.group, text=f'Пост {i}')
+            for i in range(15)]
+        # Даты не совпадают с порядком id, как у импортированных постов.
+        for i, post in enumerate(posts):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=post.pub_date - timedelta(days=i % 4))
+        call_command('rebuild_timeline', stdout=StringIO())
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        client = Client()
+        for url in (reverse('index'),
+                    reverse('group_posts', kwargs={'slug': 'test-slug'}),
+                    reverse('profile', kwargs={'username': 'ivanoff'})):
+            with self.subTest(url=url):
+                first = client.get(url).context['page']
+                self.assertEqual(list(first), expected[:10])
+                second = client.get(
+                    url, {'after': first.next_cursor}).context['page']
+                self.assertEqual(list(second), expected[10:])
+                back = client.get(
+                    url, {'before': second.previous_cursor}).context['page']
+                self.assertEqual(list(back), expected[:10])
+                by_number = client.get(url, {'page': 2}).context['page']
+                self.assertEqual(list(by_number), expected[10:])
@@ -1,6 +1,11 @@
+import re
+
 from django import forms
+from django.core.cache import cache
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.core.paginator import Paginator
 
 from ..models import User, Post, Group
@@ -172,3 +177,83 @@ class PostPagesTests (TestCase):
         )
         self.assertEqual(response.context['author'].username, 'ivanoff')
         self.assertEqual(response.context['viewer'], 'petroff')
+
+
+class FeedQueriesTests(TestCase):
+    # Максимум запросов на страницу ленты, независимо от числа постов:
+    # сообщество или автор, счетчик, записи ленты и посты страницы.
+    FEED_MAX_QUERIES = 4
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        group = Group.objects.create(title='Тестовая группа', slug='test-slug')
+        author = User.objects.create(username='ivanoff')
+        for i in range(15):
+            Post.objects.create(
+                author=User.objects.create(username=f'user{i}'),
+                group=group,
+                text=f'Тестовый пост {i}',
+            )
+            Post.objects.create(author=author, text=f'Пост автора {i}')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_feeds_have_fixed_query_count(self):
+        """Страницы ленты укладываются в фиксированное число запросов"""
+        urls = (
+            reverse('index'),
+            reverse('index') + '?page=2',
+            reverse('group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('profile', kwargs={'username': 'ivanoff'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(
+                    len(queries), self.FEED_MAX_QUERIES,
+                    '\n'.join(query['sql'] for query in queries)
+                )
+
+    def test_feeds_do_not_read_raw_text(self):
+        """Ленты читают только text_html, без исходного текста поста"""
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(reverse('index'))
+        raw_text = re.compile(r'"posts_post"\."text"(?!_)')
+        for query in queries:
+            self.assertIsNone(raw_text.search(query['sql']), query['sql'])
+
+
+class PostViewQueriesTests(TestCase):
+    # Пост, его автор и число записей автора читаются одним запросом.
+    POST_VIEW_MAX_QUERIES = 1
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create(username='ivanoff')
+        for i in range(12):
+            cls.post = Post.objects.create(author=author, text=f'Пост {i}')
+
+    def test_post_view_query_budget(self):
+        """Страница поста укладывается в бюджет запросов"""
+        url = reverse('post', kwargs={
+            'username': 'ivanoff', 'post_id': PostViewQueriesTests.post.id
+        })
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), self.POST_VIEW_MAX_QUERIES)
+        self.assertEqual(response.context['posts_count'], 12)
+        self.assertContains(response, 'Записей: 12')
+
+    def test_post_view_of_other_author_is_404(self):
+        """Пост, открытый по чужому username, не найден"""
+        response = Client().get(reverse('post', kwargs={
+            'username': 'nobody', 'post_id': PostViewQueriesTests.post.id
+        }))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,18 @@
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def commit_callbacks():
+    """Выполняет on_commit, зарегистрированные в блоке.
+
+    TestCase не коммитит транзакцию теста, поэтому сдвиги версий лент,
+    отложенные до коммита, без этого не выполнились бы.
+    """
+    start = len(connection.run_on_commit)
+    yield
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for _, callback in callbacks:
+        callback()
@@ -0,0 +1,57 @@
+"""Материализованная лента: узкая таблица TimelineEntry.
+
+Ленты выбирают страницу по индексам TimelineEntry (pub_date и post_id
+без чтения строк постов), а затем одним запросом подтягивают сами
+посты страницы. Записи поддерживают сигналы Post; bulk_create пишет их
+через batch.insert_posts или строит заново rebuild().
+"""
+from django.db import connection, transaction
+
+from .models import Post, TimelineEntry
+
+# FEED_ORDERING для записей: "-pk" потянул бы JOIN и сортировку Post.
+ORDERING = ("-pub_date", "-post_id")
+
+
+def entries(**filters):
+    """Записи ленты для paginate(..., ordering=ORDERING)."""
+    return TimelineEntry.objects.filter(**filters).only("pub_date")
+
+
+def hydrate(page):
+    """Заменяет записи страницы постами ленты в том же порядке."""
+    ids = [entry.pk for entry in page.object_list]
+    posts = Post.objects.feed().in_bulk(ids)
+    page.object_list = [posts[pk] for pk in ids if pk in posts]
+    return page
+
+
+def sync(post, created):
+    """Создает или обновляет запись ленты после сохранения поста."""
+    fields = {
+        name: post.__dict__[name]
+        for name in ("pub_date", "author_id", "group_id")
+        if name in post.__dict__
+    }
+    if not created:
+        existing = TimelineEntry.objects.filter(post_id=post.pk)
+        # Без загруженных ключей обновлять нечего, но запись уже может быть.
+        if existing.update(**fields) if fields else existing.exists():
+            return
+    TimelineEntry.objects.create(
+        post_id=post.pk, pub_date=post.pub_date, author_id=post.author_id,
+        group_id=post.group_id)
+
+
+@transaction.atomic
+def rebuild():
+    """Строит ленту заново одним INSERT ... SELECT; вернет число записей."""
+    TimelineEntry.objects.all().delete()
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote_name(TimelineEntry._meta.db_table)}"
+            " (post_id, pub_date, author_id, group_id)"
+            " SELECT id, pub_date, author_id, group_id"
+            f" FROM {quote_name(Post._meta.db_table)}")
+        return cursor.rowcount
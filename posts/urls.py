@@ -1,10 +1,20 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 urlpatterns = [
+    path("api/posts/", api.index, name="api_index"),
+    path("api/posts/batch/", api.create_posts, name="api_create_posts"),
+    path("api/groups/<slug:slug>/posts/", api.group_posts,
+         name="api_group_posts"),
+    path("api/authors/<str:username>/posts/", api.profile,
+         name="api_profile"),
+    path("api/authors/<str:username>/posts/<int:post_id>/", api.post_view,
+         name="api_post"),
+    path("group/", views.group_list, name="group_list"),
     path("group/<slug:slug>/", views.group_posts, name="group_posts"),
     path("new/", views.new_post, name="new_post"),
+    path("search/", views.search, name="search"),
     path("<str:username>/", views.profile, name="profile"),
     path("<str:username>/<int:post_id>/", views.post_view, name="post"),
     path("<str:username>/<int:post_id>/edit/",
@@ -2,36 +2,96 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import Http404
 from django.core.paginator import Paginator
+from django.utils.http import urlencode
+
+from yatube.routers import replica_reads
 
 from .models import Post, Group, User
 from .forms import PostForm
+from . import counters
+from . import timeline
+from .cache import (
+    GROUPS, INDEX, SITE, author_scope, cache_anonymous_feed,
+    conditional_feed, group_scope,
+)
+from .paginator import page_window, paginate
+from .search import search_posts
 
 POSTS_PER_PAGE = 10
+GROUPS_PER_PAGE = 20
+
+
+def index_scopes():
+    return [SITE, INDEX]
+
+
+def group_scopes(slug):
+    return [SITE, group_scope(slug)]
+
+
+def group_list_scopes():
+    return [SITE, GROUPS]
+
 
+def author_scopes(username, post_id=None):
+    return [SITE, author_scope(username)]
 
+
+@replica_reads
+@conditional_feed(index_scopes)
+@cache_anonymous_feed(index_scopes)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(
+        request, timeline.entries(), POSTS_PER_PAGE, counters.total_count(),
+        timeline.ORDERING)
+    timeline.hydrate(page)
     return render(
         request, "index.html",
         {"page": page, "paginator": paginator}
     )
 
 
+@replica_reads
+@conditional_feed(group_list_scopes)
+@cache_anonymous_feed(group_list_scopes)
+def group_list(request):
+    # Подзапросы статистики нужны только строкам страницы, не COUNT(*).
+    paginator = Paginator(Group.objects.order_by("title", "pk"),
+                          GROUPS_PER_PAGE)
+    page = paginator.get_page(request.GET.get("page"))
+    page.object_list = page.object_list.with_stats()
+    page.window = page_window(page.number, paginator.num_pages)
+    return render(
+        request, "group_list.html", {"page": page, "paginator": paginator})
+
+
+@replica_reads
+@conditional_feed(group_scopes)
+@cache_anonymous_feed(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.filter(group=group)
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(
+        request, timeline.entries(group=group), POSTS_PER_PAGE,
+        counters.group_count(group), timeline.ORDERING)
+    timeline.hydrate(page)
     return render(
         request, "group.html",
         {"group": group, "page": page, "paginator": paginator}
     )
 
 
+@replica_reads
+def search(request):
+    query = request.GET.get("q", "").strip()
+    results = search_posts(query) if query else []
+    paginator = Paginator(results, POSTS_PER_PAGE)
+    page = paginator.get_page(request.GET.get("page"))
+    page.window = page_window(page.number, paginator.num_pages)
+    context = {"query": query, "page": page, "paginator": paginator,
+               "page_query": urlencode({"q": query}) + "&"}
+    return render(request, "search.html", context)
+
+
 @login_required
 def new_post(request):
     form = PostForm(request.POST or None)
@@ -61,24 +121,31 @@ def post_edit(request, username, post_id):
     return render(request, "new.html", context)
 
 
+@replica_reads
+@conditional_feed(author_scopes)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     viewer = request.user.username
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    context = {"author": author, "viewer": viewer,
-               "page": page, "paginator": paginator}
+    paginator, page = paginate(
+        request, timeline.entries(author=author), POSTS_PER_PAGE,
+        counters.author_count(author), timeline.ORDERING)
+    timeline.hydrate(page)
+    context = {"author": author, "viewer": viewer, "page": page,
+               "paginator": paginator, "posts_count": paginator.count}
     return render(request, "profile.html", context)
 
 
+@replica_reads
+@conditional_feed(author_scopes)
 def post_view(request, username, post_id):
     viewer = request.user.username
-    author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, author=author, pk=post_id)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    context = {"author": author, "viewer": viewer,
-               "post": post, "post_id": post_id, "paginator": paginator}
+    post = get_object_or_404(
+        Post.objects.select_related("author").with_author_count(),
+        author__username=username, pk=post_id)
+    author = post.author
+    posts_count = post.author_posts_count
+    if posts_count is None:
+        posts_count = counters.author_count(author)
+    context = {"author": author, "viewer": viewer, "post": post,
+               "post_id": post_id, "posts_count": posts_count}
     return render(request, "post.html", context)
@@ -0,0 +1,232 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 не умеет асинхронные представления, поэтому AsgiHandler
+выполняет обычное WSGI-приложение в ограниченном пуле потоков: ORM и
+шаблоны работают в потоке, а прием тела запроса и отправка ответа
+медленному клиенту идут в цикле событий. Ответ уходит порциями, и поток
+ждет клиента, только пока потоковый ответ не уместился в очередь.
+
+Запуск: uvicorn yatube.asgi:application
+"""
+
+import asyncio
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from .warmup import warm_up_templates
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+# Сколько байт тела копить перед отправкой порции клиенту.
+BUFFER_SIZE = 64 * 1024
+
+
+def build_environ(scope, body):
+    """WSGI environ для HTTP-запроса ASGI (PEP 3333)."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+def run_wsgi(wsgi_application, environ, put):
+    """Выполняет WSGI-приложение и передает ответ через put().
+
+    Первым идет (статус, заголовки), затем порции тела до BUFFER_SIZE
+    байт (мелкие куски склеиваются), в конце None. Весь ответ, включая
+    close(), выполняется в одном потоке: на close() Django шлет
+    request_finished и закрывает соединения с базой этого потока.
+    """
+    response = {}
+    buffer = []
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [
+            (name.lower().encode('latin1'), value.encode('latin1'))
+            for name, value in headers
+        ]
+        return buffer.append
+
+    def flush():
+        if 'sent' not in response:
+            response['sent'] = True
+            put((response['status'], response['headers']))
+        if buffer:
+            put(b''.join(buffer))
+            buffer.clear()
+
+    result = wsgi_application(environ, start_response)
+    try:
+        size = 0
+        for chunk in result:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= BUFFER_SIZE:
+                flush()
+                size = 0
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    flush()
+    put(None)
+
+
+class ResponseStream:
+    """Передает ответ run_wsgi из потока пула в цикл событий.
+
+    Порций тела в пути не больше MAX_CHUNKS: поток ждет, пока клиент
+    заберет прошлые, вместо того чтобы копить весь ответ в памяти.
+    Заголовки и конец ответа передаются без ожидания.
+    """
+    MAX_CHUNKS = 2
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.slots = threading.Semaphore(self.MAX_CHUNKS)
+        self.aborted = threading.Event()
+
+    def put(self, item):
+        if isinstance(item, bytes):
+            self.slots.acquire()
+        if self.aborted.is_set():
+            raise ConnectionAbortedError('Ответ больше не нужен')
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+    def run(self, wsgi_application, environ):
+        """Выполняется в потоке пула; ошибку ответа передает в очередь."""
+        try:
+            run_wsgi(wsgi_application, environ, self.put)
+        except Exception as exc:
+            if not self.aborted.is_set():
+                self.put(exc)
+
+    async def get(self):
+        item = await self.queue.get()
+        if isinstance(item, bytes):
+            self.slots.release()
+        elif isinstance(item, Exception):
+            raise item
+        return item
+
+    async def abort(self, future):
+        """Будит поток: его следующий put() прервет ответ и вызовет close()."""
+        self.aborted.set()
+        self.slots.release()
+        await asyncio.wait({future})
+
+
+class AsgiHandler:
+    def __init__(self, wsgi_application, threads=8):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='yatube-asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f"Неподдерживаемый тип ASGI: {scope['type']}")
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        # Тело читается в память целиком, поэтому предел Django
+        # проверяется уже здесь, до того как запрос дойдет до Django.
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        body = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if limit is not None and size > limit:
+                await self.payload_too_large(send)
+                return
+            body.append(chunk)
+            if not message.get('more_body'):
+                break
+        await self.respond(build_environ(scope, b''.join(body)), send)
+
+    async def payload_too_large(self, send):
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type',
+                                 b'text/plain; charset=utf-8')]})
+        await send({'type': 'http.response.body',
+                    'body': 'Слишком большое тело запроса'.encode()})
+
+    async def respond(self, environ, send):
+        loop = asyncio.get_running_loop()
+        stream = ResponseStream(loop)
+        future = loop.run_in_executor(
+            self.executor, stream.run, self.wsgi_application, environ)
+        try:
+            status, headers = await stream.get()
+            await send({'type': 'http.response.start', 'status': status,
+                        'headers': headers})
+            chunk = await stream.get()
+            while True:
+                following = None if chunk is None else await stream.get()
+                await send({'type': 'http.response.body',
+                            'body': chunk or b'',
+                            'more_body': following is not None})
+                if following is None:
+                    break
+                chunk = following
+        except BaseException:
+            await stream.abort(future)
+            raise
+        await future
+
+
+application = AsgiHandler(
+    get_wsgi_application(),
+    threads=int(os.environ.get('YATUBE_ASGI_THREADS', 8)),
+)
+
+if settings.WARM_UP_TEMPLATES:
+    warm_up_templates()
@@ -0,0 +1,164 @@
+"""Замеры запросов: число и время SQL, время шаблонов и ответа.
+
+RequestMetricsMiddleware отдает замеры в заголовке Server-Timing и копит
+гистограммы по имени URL в памяти процесса; их показывает request_stats.
+Доля замеряемых запросов задается REQUEST_METRICS_SAMPLE_RATE.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (
+    DjangoTemplates, Template, reraise,
+)
+
+# Верхние границы корзин гистограммы: мс для времени, штуки для запросов.
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_local = threading.local()
+
+
+def current_metrics():
+    """Замеры текущего запроса или None, если запрос не замеряется."""
+    return getattr(_local, "metrics", None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = current_metrics()
+        if metrics is None:
+            return super().render(context, request)
+        # Вложенный render_to_string уже учтен во внешнем шаблоне.
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, который учитывает время рендера в замерах."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+
+    def snapshot(self):
+        bounds = [str(bound) for bound in BUCKETS] + ["+Inf"]
+        count = sum(self.counts)
+        return {
+            "count": count,
+            "avg": round(self.total / count, 3) if count else None,
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+
+class RequestStats:
+    """Гистограммы замеров по имени URL, общие для потоков процесса."""
+    FIELDS = ("response_ms", "sql_ms", "template_ms", "queries")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, name, **values):
+        with self.lock:
+            view = self.views.setdefault(
+                name, {field: Histogram() for field in self.FIELDS})
+            for field, value in values.items():
+                view[field].add(value)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {field: hist.snapshot() for field, hist in view.items()}
+                for name, view in self.views.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+STATS = RequestStats()
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, "REQUEST_METRICS_SAMPLE_RATE", 1.0)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        _local.metrics = metrics
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        total_ms = (time.perf_counter() - started) * 1000
+        sql_ms = metrics.sql_time * 1000
+        template_ms = metrics.template_time * 1000
+        response["Server-Timing"] = ", ".join((
+            f'sql;dur={sql_ms:.2f};desc="{metrics.queries} queries"',
+            f"tpl;dur={template_ms:.2f}",
+            f"total;dur={total_ms:.2f}",
+        ))
+        match = request.resolver_match
+        STATS.record(
+            match.view_name if match else "<unresolved>",
+            response_ms=total_ms, sql_ms=sql_ms, template_ms=template_ms,
+            queries=metrics.queries,
+        )
+        return response
+
+
+@staff_member_required
+def request_stats(request):
+    return JsonResponse(STATS.snapshot(), json_dumps_params={"indent": 2})
@@ -0,0 +1,41 @@
+"""Настройки боевого запуска.
+
+DJANGO_SETTINGS_MODULE=yatube.production_settings. Отличия от
+yatube.settings: DEBUG выключен, секреты и хосты берутся из окружения
+(YATUBE_SECRET_KEY обязателен), шаблоны компилируются один раз на процесс
+кэширующим загрузчиком и прогреваются при старте, а кэш общий для всех
+воркеров.
+"""
+import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import ALLOWED_HOSTS, CACHES, TEMPLATES
+from .warmup import production_templates
+
+DEBUG = False
+
+# Ключ из settings.py лежит в репозитории, поэтому без своего не стартуем.
+SECRET_KEY = os.environ.get('YATUBE_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Задайте YATUBE_SECRET_KEY')
+
+ALLOWED_HOSTS = os.environ.get(
+    'YATUBE_ALLOWED_HOSTS',
+    ' '.join(host for host in ALLOWED_HOSTS if host != 'testserver'),
+).split()
+
+TEMPLATES = production_templates(TEMPLATES)
+
+WARM_UP_TEMPLATES = True
+
+# Версии лент (ETag, ключи кэша страниц) должны быть общими для воркеров,
+# поэтому кэш в памяти процесса здесь заменяется файловым.
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube-cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }}
@@ -0,0 +1,111 @@
+"""Журнал медленных и повторяющихся SQL-запросов.
+
+QueryLogMiddleware оборачивает выполнение SQL на всех соединениях и пишет
+в логгер yatube.sql JSON-записи о запросах дольше SLOW_QUERY_MS и о
+запросах, текст которых повторился в одном HTTP-запросе больше
+DUPLICATE_QUERY_LIMIT раз (типичный N+1 в цикле шаблона).
+"""
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger("yatube.sql")
+
+# Обертки SQL самого проекта не считаются местом вызова запроса.
+WRAPPER_FILES = (
+    os.path.join("yatube", "metrics.py"),
+    os.path.join("yatube", "querylog.py"),
+)
+
+
+def _params_shape(params, many):
+    """Типы параметров без значений: в лог не попадают данные пользователей."""
+    if many:
+        params = list(params)
+        first = params[0] if params else ()
+        return {"rows": len(params), "row": _params_shape(first, False)}
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def query_origin():
+    """Место в коде проекта и в шаблоне, откуда выполнен запрос."""
+    code = template = None
+    frame = sys._getframe(1)
+    while frame is not None and (code is None or template is None):
+        if template is None:
+            node = frame.f_locals.get("self")
+            if isinstance(node, Node) and node.token is not None:
+                template = {"name": node.origin.template_name,
+                            "line": node.token.lineno}
+        filename = os.path.abspath(frame.f_code.co_filename)
+        relative = os.path.relpath(filename, settings.BASE_DIR)
+        if (code is None and not relative.startswith(os.pardir)
+                and relative not in WRAPPER_FILES
+                and "site-packages" not in relative):
+            code = {"file": relative, "line": frame.f_lineno,
+                    "function": frame.f_code.co_name}
+        frame = frame.f_back
+    return {"code": code, "template": template}
+
+
+class QueryLog:
+    def __init__(self, request, slow_ms, duplicate_limit):
+        self.request = request
+        self.slow_ms = slow_ms
+        self.duplicate_limit = duplicate_limit
+        self.seen = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            self.seen[sql] += 1
+            if self.slow_ms is not None and duration_ms >= self.slow_ms:
+                self.report("slow_query", sql, params, many, duration_ms)
+            if (self.duplicate_limit is not None
+                    and self.seen[sql] == self.duplicate_limit + 1):
+                self.report("duplicate_query", sql, params, many,
+                            duration_ms)
+
+    def report(self, event, sql, params, many, duration_ms):
+        match = self.request.resolver_match
+        logger.warning(json.dumps({
+            "event": event,
+            "view": match.view_name if match else None,
+            "path": self.request.path,
+            "sql": sql,
+            "duration_ms": round(duration_ms, 3),
+            "repeats": self.seen[sql],
+            "params": _params_shape(params, many),
+            "origin": query_origin(),
+        }, ensure_ascii=False))
+
+
+class QueryLogMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        slow_ms = getattr(settings, "SLOW_QUERY_MS", None)
+        duplicate_limit = getattr(settings, "DUPLICATE_QUERY_LIMIT", None)
+        if slow_ms is None and duplicate_limit is None:
+            return self.get_response(request)
+        query_log = QueryLog(request, slow_ms, duplicate_limit)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_log))
+            return self.get_response(request)
@@ -0,0 +1,70 @@
+"""Чтение с реплик, запись на основную базу.
+
+Представления, помеченные replica_reads, в GET и HEAD читают со случайной
+реплики из REPLICA_DATABASES; все остальное идет на default. После
+изменяющего запроса (POST и т.п.) браузер получает cookie, и еще
+REPLICA_PIN_SECONDS секунд его чтения идут на default: автор сразу видит
+свой пост, даже если реплика отстает.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = "pin_primary"
+SAFE_METHODS = ("GET", "HEAD")
+
+_local = threading.local()
+
+
+def replica_reads(view):
+    """Разрешает представлению читать с реплик, как csrf_exempt."""
+    view.replica_reads = True
+    return view
+
+
+def replicas():
+    return getattr(settings, "REPLICA_DATABASES", [])
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if aliases and getattr(_local, "replica", False):
+            return random.choice(aliases)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *replicas()}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема на реплики приходит вместе с данными.
+        return db not in replicas()
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.replica = False
+        if request.method not in SAFE_METHODS and replicas():
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite="Lax")
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _local.replica = (
+            request.method in SAFE_METHODS
+            and getattr(view_func, "replica_reads", False)
+            and PIN_COOKIE not in request.COOKIES
+        )
@@ -48,6 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.RequestMetricsMiddleware',
+    'yatube.querylog.QueryLogMiddleware',
+    'yatube.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,9 +63,10 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+# Кэширующий загрузчик шаблонов включен в yatube/production_settings.py.
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -84,11 +88,102 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite_backend',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живет между запросами, а не открывается на каждый.
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', 60)),
+        # Выполняются на каждом новом соединении, см. yatube/sqlite_backend.
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -64000,  # в КиБ, то есть 64 МиБ
+            'mmap_size': 256 * 1024 * 1024,
+            'busy_timeout': 5000,  # мс
+        },
+    }
+}
+
+# Реплики только для чтения, см. yatube/routers.py. Локально реплика —
+# второй файл SQLite, который обновляет команда sync_replica.
+REPLICA_DATABASES = []
+if os.environ.get('YATUBE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['YATUBE_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append('replica')
+
+DATABASE_ROUTERS = ['yatube.routers.PrimaryReplicaRouter']
+# Сколько секунд после записи браузер читает с основной базы.
+REPLICA_PIN_SECONDS = 10
+
+
+# Компилировать все шаблоны при старте wsgi/asgi (см. yatube/warmup.py);
+# имеет смысл только с кэширующим загрузчиком.
+WARM_UP_TEMPLATES = False
+
+# Доля запросов, для которых считаются SQL, время шаблонов и ответа
+# (заголовок Server-Timing и /stats/requests/); 0 отключает замеры.
+REQUEST_METRICS_SAMPLE_RATE = 1.0
+
+
+# Журнал SQL (логгер yatube.sql): запросы дольше SLOW_QUERY_MS мс и
+# запросы, повторенные в одном HTTP-запросе больше DUPLICATE_QUERY_LIMIT раз.
+# None отключает соответствующую проверку.
+SLOW_QUERY_MS = 100
+DUPLICATE_QUERY_LIMIT = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'sql': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'yatube.sql': {
+            'handlers': ['sql'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# По умолчанию кэш живет в памяти процесса; чтобы делить его между
+# воркерами, задайте каталог для файлового кэша в YATUBE_CACHE_DIR.
+# Версии лент (posts/cache.py) требуют общего кэша, поэтому
+# production_settings без него включает файловый.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 
+if os.environ.get('YATUBE_CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['YATUBE_CACHE_DIR'],
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+
+# Сколько секунд хранить страницы лент для анонимов; 0 отключает кэш.
+FEED_CACHE_TIMEOUT = 60 * 15
+
+# Сколько постов можно создать одним запросом к api/posts/batch/.
+POST_BATCH_LIMIT = 100
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -0,0 +1,29 @@
+"""SQLite с настройкой соединения через PRAGMA.
+
+Подключается как ENGINE = 'yatube.sqlite_backend'. Ключ PRAGMAS в
+настройках базы задает PRAGMA, которые выполняются на каждом новом
+соединении: journal_mode=WAL позволяет читать ленты во время записи
+new_post, busy_timeout ждет блокировку вместо ошибки "database is locked".
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+def apply_pragmas(connection, pragmas):
+    """Выполняет PRAGMA на соединении sqlite3 (DB-API)."""
+    cursor = connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if not name.isidentifier() or not str(value).lstrip("-").isalnum():
+                raise ImproperlyConfigured(
+                    f"Недопустимая PRAGMA SQLite: {name} = {value!r}")
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.settings_dict.get("PRAGMAS", {}))
+        return connection
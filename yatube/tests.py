@@ -0,0 +1,434 @@
+import asyncio
+import importlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.db import connection
+from django.urls import reverse
+
+from posts import views as posts_views
+from posts.cache import PROCESS_LOCAL_CACHES
+from posts.models import Post, User
+from .asgi import (
+    BUFFER_SIZE, AsgiHandler, application as asgi_application, build_environ,
+)
+from .metrics import STATS
+from .querylog import QueryLogMiddleware
+from .routers import (
+    PIN_COOKIE, PrimaryReplicaRouter, ReplicaRoutingMiddleware, replica_reads,
+)
+from .sqlite_backend.base import apply_pragmas
+from .warmup import template_names, warm_up_templates
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='ivanoff')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        STATS.reset()
+        self.guest_client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ несет заголовок Server-Timing с SQL, шаблонами и итогом"""
+        response = self.guest_client.get(reverse('index'))
+        timing = response['Server-Timing']
+        self.assertIn('sql;dur=', timing)
+        self.assertIn('queries"', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_stats_are_grouped_by_url_name(self):
+        """Замеры копятся по имени URL"""
+        self.guest_client.get(reverse('index'))
+        self.guest_client.get(reverse('post', kwargs={
+            'username': 'ivanoff', 'post_id': self.post.id}))
+        self.guest_client.get(reverse('post', kwargs={
+            'username': 'ivanoff', 'post_id': self.post.id}))
+        stats = STATS.snapshot()
+        self.assertEqual(stats['index']['response_ms']['count'], 1)
+        self.assertEqual(stats['post']['response_ms']['count'], 2)
+        self.assertEqual(stats['post']['queries']['avg'], 1)
+        self.assertGreater(stats['post']['template_ms']['avg'], 0)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_sampling_off_skips_measurement(self):
+        """При нулевой доле замеров запросы не замеряются"""
+        response = self.guest_client.get(reverse('index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(STATS.snapshot(), {})
+
+    def test_stats_endpoint_is_for_staff(self):
+        """Сводка доступна только персоналу"""
+        url = reverse('request_stats')
+        self.assertEqual(self.guest_client.get(url).status_code, 302)
+        staff = User.objects.create(username='admin', is_staff=True)
+        self.guest_client.force_login(staff)
+        self.guest_client.get(reverse('index'))
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('index', response.json())
+
+
+class QueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='ivanoff')
+        for i in range(3):
+            Post.objects.create(
+                author=User.objects.create(username=f'user{i}'),
+                text=f'Пост {i}')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def records(self, logs):
+        return [json.loads(message.split(':', 2)[2]) for message in logs]
+
+    @override_settings(DUPLICATE_QUERY_LIMIT=2, SLOW_QUERY_MS=None)
+    def test_duplicate_queries_are_reported_with_origin(self):
+        """Повтор одного SQL в цикле шаблона попадает в журнал"""
+        template = Template(
+            '{% for post in posts %}{{ post.author.username }}{% endfor %}')
+        request = RequestFactory().get('/')
+
+        def view(request):
+            # Без select_related: классический N+1 по авторам.
+            posts = Post.objects.all()
+            return HttpResponse(template.render(Context({'posts': posts})))
+
+        with self.assertLogs('yatube.sql', 'WARNING') as logs:
+            QueryLogMiddleware(view)(request)
+        record, = self.records(logs.output)
+        self.assertEqual(record['event'], 'duplicate_query')
+        self.assertEqual(record['repeats'], 3)
+        self.assertEqual(record['params'], ['int'])
+        self.assertEqual(record['origin']['code']['file'], 'yatube/tests.py')
+        self.assertEqual(record['origin']['template']['line'], 1)
+
+    @override_settings(SLOW_QUERY_MS=0, DUPLICATE_QUERY_LIMIT=None)
+    def test_slow_queries_are_reported_with_view(self):
+        """Запросы дольше порога пишутся с именем view"""
+        with self.assertLogs('yatube.sql', 'WARNING') as logs:
+            self.guest_client.get(reverse('index'))
+        records = self.records(logs.output)
+        self.assertTrue(records)
+        for record in records:
+            self.assertEqual(record['event'], 'slow_query')
+            self.assertEqual(record['view'], 'index')
+            self.assertIn('posts/', record['origin']['code']['file'])
+
+    def test_feed_pages_have_no_duplicate_queries(self):
+        """Ленты не повторяют один и тот же SQL"""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.sql', 'WARNING'):
+                self.guest_client.get(reverse('index'))
+                self.guest_client.get(
+                    reverse('profile', kwargs={'username': 'ivanoff'}))
+
+
+class SqlitePragmasTests(TestCase):
+    def test_connection_has_configured_pragmas(self):
+        """Соединение Django получает PRAGMA из настроек базы"""
+        pragmas = connection.settings_dict['PRAGMAS']
+        with connection.cursor() as cursor:
+            for name in ('busy_timeout', 'cache_size'):
+                cursor.execute(f'PRAGMA {name}')
+                self.assertEqual(cursor.fetchone()[0], pragmas[name])
+
+    def test_wal_on_file_database(self):
+        """На файловой базе включается журнал WAL"""
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(os.path.join(directory, 'wal.sqlite3'))
+            apply_pragmas(db, {'journal_mode': 'WAL'})
+            mode = db.execute('PRAGMA journal_mode').fetchone()[0]
+            db.close()
+        self.assertEqual(mode, 'wal')
+
+    def test_invalid_pragma_is_rejected(self):
+        """PRAGMA с подозрительным значением не выполняется"""
+        db = sqlite3.connect(':memory:')
+        with self.assertRaises(ImproperlyConfigured):
+            apply_pragmas(db, {'journal_mode': 'WAL; DROP TABLE x'})
+        db.close()
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def route(self, request, view):
+        """Алиас, который роутер выбрал бы для чтения внутри view"""
+        chosen = []
+
+        def get_response(request):
+            chosen.append(PrimaryReplicaRouter().db_for_read(Post))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        middleware.process_view(request, view, (), {})
+        response = middleware(request)
+        return chosen[0], response
+
+    def test_read_views_use_replica(self):
+        """Ленты и страницы постов читают с реплики"""
+        for view in (posts_views.index, posts_views.group_posts,
+                     posts_views.profile, posts_views.post_view):
+            with self.subTest(view=view.__name__):
+                alias, _ = self.route(RequestFactory().get('/'), view)
+                self.assertEqual(alias, 'replica')
+
+    def test_unmarked_and_unsafe_requests_use_primary(self):
+        """Формы, запись и непомеченные представления идут на default"""
+        factory = RequestFactory()
+        for request, view in (
+                (factory.get('/new/'), posts_views.new_post),
+                (factory.post('/'), posts_views.index),
+                (factory.get('/'), lambda request: None)):
+            with self.subTest(method=request.method, path=request.path):
+                alias, _ = self.route(request, view)
+                self.assertEqual(alias, 'default')
+        self.assertEqual(PrimaryReplicaRouter().db_for_write(Post), 'default')
+
+    def test_write_pins_reads_to_primary(self):
+        """После записи чтения автора идут на default"""
+        factory = RequestFactory()
+        _, response = self.route(factory.post('/new/'), posts_views.new_post)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        request = factory.get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        alias, _ = self.route(request, posts_views.index)
+        self.assertEqual(alias, 'default')
+
+    def test_new_post_sets_pin_cookie(self):
+        """Публикация поста ставит cookie привязки к основной базе"""
+        client = Client()
+        client.force_login(User.objects.create(username='writer'))
+        response = client.post(reverse('new_post'), {'text': 'Свежий пост'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas_everything_uses_primary(self):
+        """Без реплик роутер не меняет поведение и не ставит cookie"""
+        view = replica_reads(lambda request: None)
+        alias, _ = self.route(RequestFactory().get('/'), view)
+        self.assertEqual(alias, 'default')
+        _, response = self.route(RequestFactory().post('/'), view)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class AsgiHandlerTests(TestCase):
+    def call(self, app, scope, messages):
+        sent = []
+        messages = iter(messages)
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(app(scope, receive, send))
+        return sent
+
+    def http_scope(self, method, path, query=b'', headers=()):
+        return {'type': 'http', 'method': method, 'path': path,
+                'query_string': query, 'headers': list(headers)}
+
+    def test_environ_follows_wsgi_conventions(self):
+        """Путь, строка запроса и заголовки попадают в environ как в WSGI"""
+        environ = build_environ(self.http_scope(
+            'GET', '/группа/', b'page=2',
+            [(b'content-type', b'text/plain'), (b'x-trace', b'a'),
+             (b'x-trace', b'b')]), b'')
+        self.assertEqual(environ['PATH_INFO'],
+                         '/группа/'.encode().decode('latin1'))
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_TRACE'], 'a,b')
+
+    def test_body_is_collected_before_wsgi_call(self):
+        """Тело из нескольких сообщений доходит до приложения целиком"""
+        def echo(environ, start_response):
+            start_response('201 Created', [('Content-Type', 'text/plain')])
+            return [environ['wsgi.input'].read()]
+
+        sent = self.call(AsgiHandler(echo, threads=1),
+                         self.http_scope('POST', '/'), [
+            {'type': 'http.request', 'body': b'abc', 'more_body': True},
+            {'type': 'http.request', 'body': b'def'},
+        ])
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'content-type', b'text/plain'), sent[0]['headers'])
+        self.assertEqual(sent[1]['body'], b'abcdef')
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=4)
+    def test_oversized_body_is_rejected_early(self):
+        """Тело больше DATA_UPLOAD_MAX_MEMORY_SIZE дочитывается не до конца"""
+        def app(environ, start_response):
+            raise AssertionError('Приложение не должно вызываться')
+
+        sent = self.call(AsgiHandler(app, threads=1),
+                         self.http_scope('POST', '/'), [
+            {'type': 'http.request', 'body': b'abc', 'more_body': True},
+            {'type': 'http.request', 'body': b'def', 'more_body': True},
+        ])
+        self.assertEqual(sent[0]['status'], 413)
+        self.assertFalse(sent[-1].get('more_body'))
+
+    def streaming_app(self, chunks, log):
+        """WSGI-приложение с потоковым ответом, которое пишет в log."""
+        class Result:
+            def __iter__(self):
+                for number in range(chunks):
+                    log.append(('chunk', number))
+                    yield bytes(BUFFER_SIZE)
+
+            def close(self):
+                log.append(('close', threading.current_thread().name))
+
+        def app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return Result()
+        return app
+
+    def test_streaming_response_is_sent_in_chunks(self):
+        """Потоковый ответ уходит порциями, а не одним телом"""
+        log = []
+        sent = self.call(AsgiHandler(self.streaming_app(3, log), threads=1),
+                         self.http_scope('GET', '/'),
+                         [{'type': 'http.request'}])
+        bodies = sent[1:]
+        self.assertEqual(len(bodies), 3)
+        self.assertEqual([message['more_body'] for message in bodies],
+                         [True, True, False])
+        self.assertTrue(all(len(message['body']) == BUFFER_SIZE
+                            for message in bodies))
+        self.assertEqual(log[-1][0], 'close')
+        self.assertTrue(log[-1][1].startswith('yatube-asgi'))
+
+    def test_slow_client_holds_back_the_stream(self):
+        """Приложение не уходит вперед клиента больше чем на пару порций"""
+        log = []
+        lag = []
+
+        async def receive():
+            return {'type': 'http.request'}
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                lag.append(len(log) - len(lag) - 1)
+
+        handler = AsgiHandler(self.streaming_app(20, log), threads=1)
+        asyncio.run(handler(self.http_scope('GET', '/'), receive, send))
+        self.assertEqual(len(lag), 20)
+        self.assertLessEqual(max(lag), 4)
+
+    def test_disconnect_stops_stream_and_closes_in_pool(self):
+        """Обрыв отправки прерывает ответ и вызывает close() в пуле"""
+        log = []
+
+        async def receive():
+            return {'type': 'http.request'}
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                raise ConnectionResetError
+
+        handler = AsgiHandler(self.streaming_app(1000, log), threads=1)
+        with self.assertRaises(ConnectionResetError):
+            asyncio.run(handler(self.http_scope('GET', '/'), receive, send))
+        self.assertLess(len(log), 10)
+        self.assertEqual(log[-1][0], 'close')
+        self.assertTrue(log[-1][1].startswith('yatube-asgi'))
+
+    def test_application_serves_django_pages(self):
+        """ASGI-приложение проекта отдает страницы Django"""
+        sent = self.call(asgi_application,
+                         self.http_scope('GET', reverse('about:author')),
+                         [{'type': 'http.request'}])
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn('Server-Timing'.lower().encode(),
+                      dict(sent[0]['headers']))
+
+    def test_lifespan_is_acknowledged(self):
+        """Сервер получает подтверждение запуска и остановки"""
+        sent = self.call(AsgiHandler(None, threads=1), {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'},
+        ])
+        self.assertEqual([message['type'] for message in sent], [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+
+def load_production_settings(**environ):
+    """Заново импортирует yatube.production_settings с этим окружением."""
+    environ.setdefault('YATUBE_SECRET_KEY', 'test-secret-key')
+    with mock.patch.dict(os.environ, environ):
+        module = importlib.import_module('yatube.production_settings')
+        return importlib.reload(module)
+
+
+class TemplateWarmUpTests(TestCase):
+    def production_engine(self):
+        production_settings = load_production_settings()
+        params = dict(production_settings.TEMPLATES[0])
+        params.pop('BACKEND')
+        params['NAME'] = 'production'
+        params['OPTIONS'] = dict(params['OPTIONS'])
+        return DjangoTemplates(params).engine
+
+    def test_all_templates_compile(self):
+        """Все шаблоны проекта компилируются без ошибок"""
+        compiled, errors, _ = warm_up_templates()
+        self.assertEqual(errors, {})
+        self.assertGreater(compiled, 0)
+        output = StringIO()
+        call_command('warm_templates', stdout=output)
+        self.assertIn(str(compiled), output.getvalue())
+
+    def test_production_engine_caches_compiled_templates(self):
+        """В боевых настройках шаблоны компилируются один раз"""
+        engine = self.production_engine()
+        loader = engine.template_loaders[0]
+        self.assertIsInstance(loader, CachedLoader)
+        names = template_names(engine)
+        self.assertIn('inclusions/post_card.html', names)
+        for name in names:
+            engine.get_template(name)
+        self.assertIs(engine.get_template('index.html'),
+                      engine.get_template('index.html'))
+        self.assertNotIn(
+            'django.template.context_processors.debug',
+            engine.context_processors)
+
+    def test_production_cache_is_shared_between_workers(self):
+        """В боевых настройках кэш версий лент общий для процессов"""
+        production_settings = load_production_settings()
+        self.assertNotIn(production_settings.CACHES['default']['BACKEND'],
+                         PROCESS_LOCAL_CACHES)
+
+    def test_production_requires_secret_key(self):
+        """Без YATUBE_SECRET_KEY боевые настройки не загружаются"""
+        with self.assertRaises(ImproperlyConfigured):
+            load_production_settings(YATUBE_SECRET_KEY='')
+        production_settings = load_production_settings(
+            YATUBE_SECRET_KEY='from-env')
+        self.assertEqual(production_settings.SECRET_KEY, 'from-env')
+        self.assertNotIn('testserver', production_settings.ALLOWED_HOSTS)
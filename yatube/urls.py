@@ -16,6 +16,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from .metrics import request_stats
+
 urlpatterns = [
     #  регистрация и авторизация
     path("auth/", include("users.urls")),
@@ -23,6 +25,7 @@ urlpatterns = [
 
     #  раздел администратора
     path("admin/", admin.site.urls),
+    path("stats/requests/", request_stats, name="request_stats"),
     path("", include("posts.urls")),
     path('about/', include('about.urls', namespace='about'))
 ]
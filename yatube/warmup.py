@@ -0,0 +1,77 @@
+"""Прогрев кэширующего загрузчика шаблонов.
+
+Кэш загрузчика живет в памяти процесса, поэтому warm_up_templates()
+вызывается при старте wsgi/asgi; команда warm_templates делает то же
+самое и показывает, сколько шаблонов скомпилировано и какие не собрались.
+"""
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+
+def _template_dirs(engine):
+    for loader in engine.template_loaders:
+        # Кэширующий загрузчик хранит вложенные в .loaders.
+        for inner in getattr(loader, "loaders", [loader]):
+            if hasattr(inner, "get_dirs"):
+                yield from inner.get_dirs()
+
+
+def template_names(engine):
+    """Имена всех шаблонов в каталогах загрузчиков движка."""
+    names = set()
+    for directory in _template_dirs(engine):
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                path = os.path.relpath(os.path.join(root, filename), directory)
+                names.add(path.replace(os.sep, "/"))
+    return sorted(names)
+
+
+def production_templates(templates):
+    """TEMPLATES с кэширующим загрузчиком и без контекста debug."""
+    first = templates[0]
+    return [{
+        **first,
+        # С явным списком loaders APP_DIRS задается загрузчиком
+        # app_directories.
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **first["OPTIONS"],
+            "context_processors": [
+                processor
+                for processor in first["OPTIONS"]["context_processors"]
+                if processor != "django.template.context_processors.debug"
+            ],
+            "loaders": [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
+        },
+    }, *templates[1:]]
+
+
+def warm_up_templates():
+    """Компилирует все шаблоны Django-движков проекта.
+
+    Возвращает (скомпилировано, ошибки {имя: текст}, секунд).
+    """
+    started = time.perf_counter()
+    compiled = 0
+    errors = {}
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError) as exc:
+                errors[name] = str(exc)
+            else:
+                compiled += 1
+    return compiled, errors, time.perf_counter() - started